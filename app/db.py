@@ -74,3 +74,22 @@ def get_db():
         raise RuntimeError("Firestore not initialized. Call init_firestore() first.")
     return db
 
+
+def write_with_audit(entity, activity, delete=False, must_exist=False, stage=None):
+    """Commit an entity write and its activity log entry in a single batch
+
+    Both writes go out in one RPC and are applied atomically, so a mutation
+    is never persisted without its audit record (or vice versa). With
+    must_exist, a delete of a missing document raises NotFound and nothing
+    is written. stage, if given, is called with the batch after the entity
+    write to add related writes that must succeed or fail with it.
+    """
+    batch = get_db().batch()
+    if delete:
+        entity.delete(batch=batch, must_exist=must_exist)
+    else:
+        entity.save(batch=batch)
+    if stage:
+        stage(batch)
+    activity.save(batch=batch)
+    batch.commit()
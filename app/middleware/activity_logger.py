@@ -2,6 +2,7 @@ from flask import request
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
 from functools import wraps
 from app.models import ActivityLog
+from app.utils.background_tasks import enqueue_activity
 
 
 def log_activity(event_type, description):
@@ -19,7 +20,7 @@ def log_activity(event_type, description):
         ip_address=request.remote_addr,
         user_agent=request.headers.get('User-Agent')
     )
-    activity.save()
+    enqueue_activity(activity)
     return activity
 
 
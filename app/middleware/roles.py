@@ -0,0 +1,30 @@
+from flask import request
+from flask_jwt_extended import get_jwt
+from functools import wraps
+from app.utils.json_response import ojsonify
+
+
+def _role_required(roles, message):
+    """Build a decorator that rejects requests whose JWT role is not in roles
+
+    Must be stacked under @jwt_required(); get_jwt() then returns the claims
+    already decoded for this request. Like @jwt_required(), it lets CORS
+    preflight (OPTIONS) requests through.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method != 'OPTIONS' and get_jwt().get('role', 'user') not in roles:
+                return ojsonify({
+                    'error': {
+                        'code': 'FORBIDDEN',
+                        'message': message
+                    }
+                }, 403)
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+# Require superadmin role only
+superadmin_required = _role_required(('superadmin',), 'Superadmin access required')
@@ -19,7 +19,8 @@ class ActivityLog(BaseModel):
         user_email = None
         if hasattr(self, 'user_id') and self.user_id:
             from app.models.user import User
-            user = User.get_by_id(self.user_id)
+            # Many entries share a user, so look it up once per request
+            user = User.get_cached(self.user_id)
             if user:
                 user_email = user.email
         
@@ -42,11 +42,8 @@ class Application(BaseModel):
     
     @classmethod
     def name_exists(cls, name: str, exclude_id: Optional[str] = None) -> bool:
-        """Check if name already exists"""
-        apps = cls.query(name=name)
-        if exclude_id:
-            apps = [a for a in apps if a.id != exclude_id]
-        return len(apps) > 0
+        """Check if name already exists (document-ID-only query, see BaseModel.exists)"""
+        return cls.exists(exclude_id=exclude_id, name=name)
     
     def get_user_count(self) -> int:
         """Get count of users assigned to this application"""
@@ -56,10 +53,10 @@ class Application(BaseModel):
         users = db.collection('users').where('assigned_application_ids', 'array_contains', self.id).stream()
         return len(list(users))
     
-    def save(self) -> str:
+    def save(self, batch=None) -> str:
         """Override save to update last_updated"""
         self.last_updated = datetime.utcnow()
-        return super().save()
+        return super().save(batch=batch)
     
     def __repr__(self):
         return f'<Application {self.name if hasattr(self, "name") else "Unknown"}>'
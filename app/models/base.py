@@ -3,12 +3,17 @@ Base model class for Firestore documents
 """
 from datetime import datetime
 from typing import Optional, Dict, Any
+from flask import g, has_app_context
+from google.cloud.firestore_v1.field_path import FieldPath
 from app.db import get_db
+from app.utils.search import search_tokens
 
 
 class BaseModel:
     """Base model for Firestore documents"""
     collection_name: str = None
+    # Text fields whose 3-grams are stored in search_tokens on save (see app.utils.search)
+    SEARCH_FIELDS: tuple = ()
     
     def __init__(self, **kwargs):
         """Initialize model with data"""
@@ -28,8 +33,15 @@ class BaseModel:
         result.update(self._data)
         return result
     
-    def save(self) -> str:
-        """Save document to Firestore"""
+    def save(self, batch=None) -> str:
+        """Save document to Firestore
+
+        If a write batch (or transaction) is given, the write is staged on it
+        and only sent when the caller commits the batch.
+        """
+        self._forget_cached()
+        if self.SEARCH_FIELDS:
+            self._data['search_tokens'] = self._search_tokens()
         collection = self.get_collection()
         # Convert datetime objects to Firestore timestamps
         data = self._prepare_data_for_firestore(self._data)
@@ -37,21 +49,39 @@ class BaseModel:
         if self.id:
             # Update existing document
             doc_ref = collection.document(self.id)
-            doc_ref.update(data)
+            if batch is not None:
+                batch.update(doc_ref, data)
+            else:
+                doc_ref.update(data)
             return self.id
         else:
             # Create new document
-            # collection.add() returns (timestamp, DocumentReference)
-            _, doc_ref = collection.add(data)
+            if batch is not None:
+                # Allocate the ID client-side so it is known before the commit
+                doc_ref = collection.document()
+                batch.create(doc_ref, data)
+            else:
+                # collection.add() returns (timestamp, DocumentReference)
+                _, doc_ref = collection.add(data)
             self.id = doc_ref.id
             return self.id
     
-    def delete(self):
-        """Delete document from Firestore"""
+    def delete(self, batch=None, must_exist: bool = False):
+        """Delete document from Firestore (staged on batch if given)
+
+        With must_exist, the delete carries an exists precondition and the
+        write fails with google.api_core.exceptions.NotFound if the document
+        is missing, so callers don't need to read it first.
+        """
         if not self.id:
             raise ValueError("Cannot delete document without id")
-        collection = self.get_collection()
-        collection.document(self.id).delete()
+        self._forget_cached()
+        doc_ref = self.get_collection().document(self.id)
+        option = get_db().write_option(exists=True) if must_exist else None
+        if batch is not None:
+            batch.delete(doc_ref, option=option)
+        else:
+            doc_ref.delete(option=option)
     
     @classmethod
     def get_by_id(cls, doc_id: str):
@@ -64,9 +94,61 @@ class BaseModel:
         return None
     
     @classmethod
-    def get_all(cls, limit: Optional[int] = None):
-        """Get all documents"""
+    def get_cached(cls, doc_id: str):
+        """Get document by ID, memoized for the current request
+
+        Repeated lookups of the same document within one request (e.g. the
+        user behind many activity log entries) read Firestore once. Outside
+        an app context this is a plain get_by_id().
+        """
+        if not has_app_context():
+            return cls.get_by_id(doc_id)
+        cache = g.setdefault('_entity_cache', {})
+        key = (cls.collection_name, doc_id)
+        if key not in cache:
+            cache[key] = cls.get_by_id(doc_id)
+        return cache[key]
+    
+    def _forget_cached(self):
+        """Drop this document from the request cache after a write"""
+        if self.id and has_app_context():
+            g.get('_entity_cache', {}).pop((self.collection_name, self.id), None)
+    
+    @classmethod
+    def get_many(cls, doc_ids) -> Dict[str, 'BaseModel']:
+        """Get documents by ID in one batched read, keyed by ID (missing IDs are omitted)"""
+        if not doc_ids:
+            return {}
+        collection = cls.get_collection()
+        refs = [collection.document(doc_id) for doc_id in doc_ids]
+        return {
+            doc.id: cls(id=doc.id, **doc.to_dict())
+            for doc in get_db().get_all(refs) if doc.exists
+        }
+    
+    @classmethod
+    def get_by_field_in(cls, field: str, values) -> Dict[Any, 'BaseModel']:
+        """Get documents whose field equals any of values, keyed by that field
+
+        Uses Firestore 'in' queries, which accept at most 30 values each, so
+        values are looked up in chunks of 30. If several documents share a
+        value, the first one returned wins.
+        """
+        values = list(dict.fromkeys(values))
+        result = {}
+        for i in range(0, len(values), 30):
+            query = cls.get_collection().where(field, 'in', values[i:i + 30])
+            for doc in query.stream():
+                data = doc.to_dict()
+                result.setdefault(data.get(field), cls(id=doc.id, **data))
+        return result
+    
+    @classmethod
+    def get_all(cls, limit: Optional[int] = None, fields=None):
+        """Get all documents (only the given fields, if any)"""
         query = cls.get_collection()
+        if fields:
+            query = query.select(fields)
         if limit:
             query = query.limit(limit)
         docs = query.stream()
@@ -81,13 +163,57 @@ class BaseModel:
         docs = query.stream()
         return [cls(id=doc.id, **doc.to_dict()) for doc in docs]
     
+    @classmethod
+    def exists(cls, exclude_id: Optional[str] = None, **filters) -> bool:
+        """Check if any document (other than exclude_id) matches filters
+
+        Runs a query projected to the document ID that reads at most two
+        results, so no document fields are fetched. (An empty select() would
+        return every field.)
+        """
+        query = cls.get_collection()
+        for field, value in filters.items():
+            query = query.where(field, '==', value)
+        query = query.select([FieldPath.document_id()]).limit(2 if exclude_id else 1)
+        return any(doc.id != exclude_id for doc in query.stream())
+    
+    def _search_tokens(self):
+        """search_tokens for the current values of SEARCH_FIELDS"""
+        return search_tokens(*(self._data.get(field) for field in self.SEARCH_FIELDS))
+    
+    @classmethod
+    def backfill_search_tokens(cls) -> int:
+        """Write search_tokens on documents saved before they existed (or
+        before SEARCH_FIELDS changed)"""
+        db = get_db()
+        batch = db.batch()
+        pending = 0
+        updated = 0
+        for doc in cls.get_collection().stream():
+            obj = cls(id=doc.id, **doc.to_dict())
+            tokens = obj._search_tokens()
+            if obj._data.get('search_tokens') == tokens:
+                continue
+            batch.update(doc.reference, {'search_tokens': tokens})
+            pending += 1
+            updated += 1
+            # Firestore caps a batch at 500 writes
+            if pending == 500:
+                batch.commit()
+                batch = db.batch()
+                pending = 0
+        if pending:
+            batch.commit()
+        return updated
+    
     @classmethod
     def count(cls, **filters) -> int:
-        """Count documents matching filters"""
+        """Count documents matching filters (server-side COUNT aggregation)"""
         query = cls.get_collection()
         for field, value in filters.items():
             query = query.where(field, '==', value)
-        return len(list(query.stream()))
+        results = query.count().get()
+        return results[0][0].value
     
     def _prepare_data_for_firestore(self, data: Dict) -> Dict:
         """Prepare data for Firestore (convert datetime, etc.)"""
@@ -1,4 +1,5 @@
 from app.models.base import BaseModel
+from app.utils.search import query_token
 from datetime import datetime
 from typing import Optional
 
@@ -6,6 +7,11 @@ from typing import Optional
 class FileCategory(BaseModel):
     """FileCategory model for Firestore"""
     collection_name = 'file_categories'
+    # Fields every document carries, so ordering by them in Firestore never drops documents
+    SORTABLE_FIELDS = ('code', 'name', 'status', 'created_date', 'last_updated')
+    # Fields matched by the free-text search (indexed as search_tokens on save),
+    # also kept lowercased on the instance
+    SEARCH_FIELDS = ('code', 'name', 'description')
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -18,6 +24,23 @@ class FileCategory(BaseModel):
             self._data['last_updated'] = datetime.utcnow()
         if 'short_code' not in self._data:
             self._data['short_code'] = []
+        self._refresh_search_text()
+    
+    def _refresh_search_text(self):
+        """Cache lowercased copies of the searchable fields (outside _data, so
+        they are never written to Firestore)"""
+        object.__setattr__(self, '_code_lc', (self._data.get('code') or '').lower())
+        object.__setattr__(self, '_name_lc', (self._data.get('name') or '').lower())
+        object.__setattr__(self, '_desc_lc', (self._data.get('description') or '').lower())
+    
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in self.SEARCH_FIELDS:
+            self._refresh_search_text()
+    
+    def matches_search(self, term: str) -> bool:
+        """Check if an already-lowercased term occurs in code, name or description"""
+        return term in self._code_lc or term in self._name_lc or term in self._desc_lc
     
     def to_dict(self, user_count=None):
         """Convert to dictionary with optional pre-calculated user_count for performance"""
@@ -37,6 +60,66 @@ class FileCategory(BaseModel):
             'user_count': user_count
         }
     
+    @classmethod
+    def stream(cls, limit: Optional[int] = None, status: Optional[str] = None,
+               sort: Optional[str] = None, order: str = 'asc', offset: int = 0):
+        """Yield file categories as Firestore streams them, with filtering,
+        ordering and paging done by Firestore"""
+        query = cls.get_collection()
+        if status:
+            query = query.where('status', '==', status)
+        if sort:
+            direction = 'DESCENDING' if order == 'desc' else 'ASCENDING'
+            query = query.order_by(sort, direction=direction)
+        if offset:
+            query = query.offset(offset)
+        if limit:
+            query = query.limit(limit)
+        for doc in query.stream():
+            yield cls(id=doc.id, **doc.to_dict())
+    
+    @classmethod
+    def get_all(cls, limit: Optional[int] = None, status: Optional[str] = None,
+                sort: Optional[str] = None, order: str = 'asc', offset: int = 0):
+        """Get file categories as a list (see stream() for the parameters)"""
+        return list(cls.stream(limit=limit, status=status, sort=sort, order=order, offset=offset))
+    
+    @classmethod
+    def search(cls, term: str, status: Optional[str] = None,
+               sort: str = 'code', order: str = 'asc'):
+        """Get file categories whose code, name or description contains term
+
+        Firestore narrows the read to documents whose search_tokens contain the
+        first 3-gram of the term; candidates are then matched exactly and
+        sorted in Python. Terms shorter than one 3-gram fall back to a scan.
+        """
+        term = term.lower()
+        token = query_token(term)
+        if token is None:
+            return [cat for cat in cls.stream(status=status, sort=sort, order=order)
+                    if cat.matches_search(term)]
+        
+        query = cls.get_collection().where('search_tokens', 'array_contains', token)
+        if status:
+            query = query.where('status', '==', status)
+        matches = []
+        for doc in query.stream():
+            cat = cls(id=doc.id, **doc.to_dict())
+            if cat.matches_search(term):
+                matches.append(cat)
+        # Documents missing the sort field (e.g. no name) must not be compared
+        # with None, so they sort after the rest (before it when descending)
+        matches.sort(key=lambda cat: (cat._data.get(sort) is None, cat._data.get(sort)),
+                     reverse=(order == 'desc'))
+        return matches
+    
+    @classmethod
+    def get_count(cls, status: Optional[str] = None) -> int:
+        """Count file categories, optionally filtered by status"""
+        if status:
+            return cls.count(status=status)
+        return cls.count()
+    
     @classmethod
     def get_by_code(cls, code: str):
         """Get file category by code"""
@@ -45,27 +128,18 @@ class FileCategory(BaseModel):
     
     @classmethod
     def code_exists(cls, code: str, exclude_id: Optional[str] = None) -> bool:
-        """Check if code already exists"""
-        categories = cls.query(code=code)
-        if exclude_id:
-            categories = [c for c in categories if c.id != exclude_id]
-        return len(categories) > 0
+        """Check if code already exists (document-ID-only query, see BaseModel.exists)"""
+        return cls.exists(exclude_id=exclude_id, code=code)
     
     def get_user_count(self) -> int:
-        """Get count of users assigned to this category"""
+        """Get count of users assigned to this category (COUNT aggregation)"""
         from app.models.user import User
-        all_users = User.get_all()
-        count = 0
-        for user in all_users:
-            if hasattr(user, 'assigned_file_category_ids') and user.assigned_file_category_ids:
-                if self.id in user.assigned_file_category_ids:
-                    count += 1
-        return count
+        return User.count_assigned('assigned_file_category_ids', self.id)
     
-    def save(self) -> str:
+    def save(self, batch=None) -> str:
         """Override save to update last_updated"""
         self.last_updated = datetime.utcnow()
-        return super().save()
+        return super().save(batch=batch)
     
     def __repr__(self):
         return f'<FileCategory {self.code if hasattr(self, "code") else "Unknown"}>'
@@ -1,13 +1,35 @@
 from app.models.base import BaseModel
 from app.db import get_db
+from app.utils.search import query_token
 from datetime import datetime
+import hashlib
 import bcrypt
-from typing import List, Optional
+from google.api_core.exceptions import AlreadyExists
+from typing import Any, List, Optional, Tuple
+
+
+def hash_password(password: str) -> str:
+    """Hash a password with bcrypt (bcrypt releases the GIL, so this can run in threads)"""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
 
 class User(BaseModel):
     """User model for Firestore"""
     collection_name = 'users'
+    # Fields every document carries, so keyset pagination on them never drops documents
+    SORTABLE_FIELDS = ('created_date', 'email', 'role', 'status')
+    # Of those, the sorts with composite indexes (firestore.indexes.json) for
+    # the role/status/category/search filters. Firestore merges these
+    # indexes when several filters are combined.
+    FILTERED_SORTABLE_FIELDS = ('created_date',)
+    # Fields matched by the free-text search (indexed as search_tokens on save)
+    SEARCH_FIELDS = ('email', 'first_name', 'last_name')
+    # Fields read for listings: what to_dict() and the list filters use, without
+    # password_hash or search_tokens
+    LIST_FIELDS = (
+        'email', 'role', 'status', 'first_name', 'last_name', 'created_date', 'last_login',
+        'assigned_application_ids', 'assigned_file_category_ids'
+    )
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -25,10 +47,7 @@ class User(BaseModel):
     
     def set_password(self, password):
         """Hash and set password"""
-        self.password_hash = bcrypt.hashpw(
-            password.encode('utf-8'),
-            bcrypt.gensalt()
-        ).decode('utf-8')
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
         """Verify password"""
@@ -39,9 +58,63 @@ class User(BaseModel):
             self.password_hash.encode('utf-8')
         )
     
+    @classmethod
+    def load_relations(cls, users, all_users=None, known_categories=None):
+        """Batch-load the applications and file categories assigned to users
+
+        Returns the keyword arguments for to_dict(). Categories already in
+        known_categories are not read again. User counts per application and
+        category are tallied over all_users when those are already loaded,
+        and otherwise come from Firestore count aggregations.
+        """
+        from app.models.application import Application
+        from app.models.file_category import FileCategory
+        
+        app_ids = set()
+        category_ids = set()
+        for user in users:
+            app_ids.update(user._data.get('assigned_application_ids') or [])
+            category_ids.update(user._data.get('assigned_file_category_ids') or [])
+        
+        if all_users is not None:
+            app_user_counts = dict.fromkeys(app_ids, 0)
+            category_user_counts = dict.fromkeys(category_ids, 0)
+            for u in all_users:
+                for app_id in u._data.get('assigned_application_ids') or []:
+                    if app_id in app_user_counts:
+                        app_user_counts[app_id] += 1
+                for category_id in u._data.get('assigned_file_category_ids') or []:
+                    if category_id in category_user_counts:
+                        category_user_counts[category_id] += 1
+        else:
+            app_user_counts = {
+                app_id: cls.count_assigned('assigned_application_ids', app_id) for app_id in app_ids
+            }
+            category_user_counts = {
+                category_id: cls.count_assigned('assigned_file_category_ids', category_id)
+                for category_id in category_ids
+            }
+        
+        file_categories_cache = {
+            category_id: category for category_id, category in (known_categories or {}).items()
+            if category_id in category_ids
+        }
+        file_categories_cache.update(FileCategory.get_many(category_ids - file_categories_cache.keys()))
+        
+        return {
+            'applications_cache': Application.get_many(app_ids),
+            'file_categories_cache': file_categories_cache,
+            'app_user_counts': app_user_counts,
+            'category_user_counts': category_user_counts
+        }
+    
     def to_dict(self, applications_cache=None, file_categories_cache=None, 
                 app_user_counts=None, category_user_counts=None):
-        """Convert to dictionary with optional pre-loaded caches for performance"""
+        """Convert to dictionary with optional pre-loaded caches for performance
+
+        Without caches, the assigned applications and file categories are
+        batch-loaded via load_relations().
+        """
         result = {
             'id': self.id,
             'email': self.email,
@@ -53,65 +126,192 @@ class User(BaseModel):
             'last_login': self.last_login.isoformat() if hasattr(self, 'last_login') and self.last_login else None,
         }
         
-        # Load assigned applications if needed
-        if hasattr(self, 'assigned_application_ids') and self.assigned_application_ids:
-            from app.models.application import Application
-            apps = []
-            if applications_cache is not None:
-                # Use pre-loaded cache for O(1) lookup
-                for app_id in self.assigned_application_ids:
-                    app = applications_cache.get(app_id)
-                    if app:
-                        # Get user_count from provided counts if available
-                        app_user_count = app_user_counts.get(app_id) if app_user_counts else None
-                        apps.append(app.to_dict(user_count=app_user_count))
-            else:
-                # Fallback to individual queries (for backward compatibility)
-                for app_id in self.assigned_application_ids:
-                    app = Application.get_by_id(app_id)
-                    if app:
-                        apps.append(app.to_dict())
-            result['assigned_applications'] = apps
-        else:
-            result['assigned_applications'] = []
+        app_ids = self._data.get('assigned_application_ids') or []
+        category_ids = self._data.get('assigned_file_category_ids') or []
+        if (app_ids or category_ids) and applications_cache is None and file_categories_cache is None:
+            relations = self.load_relations([self])
+            applications_cache = relations['applications_cache']
+            file_categories_cache = relations['file_categories_cache']
+            app_user_counts = relations['app_user_counts']
+            category_user_counts = relations['category_user_counts']
         
-        # Load assigned file categories if needed
-        if hasattr(self, 'assigned_file_category_ids') and self.assigned_file_category_ids:
-            from app.models.file_category import FileCategory
-            categories = []
-            if file_categories_cache is not None:
-                # Use pre-loaded cache for O(1) lookup
-                for category_id in self.assigned_file_category_ids:
-                    category = file_categories_cache.get(category_id)
-                    if category:
-                        # Get user_count from provided counts if available
-                        cat_user_count = category_user_counts.get(category_id) if category_user_counts else None
-                        categories.append(category.to_dict(user_count=cat_user_count))
-            else:
-                # Fallback to individual queries (for backward compatibility)
-                for category_id in self.assigned_file_category_ids:
-                    category = FileCategory.get_by_id(category_id)
-                    if category:
-                        categories.append(category.to_dict())
-            result['assigned_file_categories'] = categories
-        else:
-            result['assigned_file_categories'] = []
+        # Assigned applications (O(1) lookups in the pre-loaded cache)
+        apps = []
+        for app_id in app_ids:
+            app = (applications_cache or {}).get(app_id)
+            if app:
+                # Get user_count from provided counts if available
+                app_user_count = app_user_counts.get(app_id) if app_user_counts else None
+                apps.append(app.to_dict(user_count=app_user_count))
+        result['assigned_applications'] = apps
+        
+        # Assigned file categories
+        categories = []
+        for category_id in category_ids:
+            category = (file_categories_cache or {}).get(category_id)
+            if category:
+                # Get user_count from provided counts if available
+                cat_user_count = category_user_counts.get(category_id) if category_user_counts else None
+                categories.append(category.to_dict(user_count=cat_user_count))
+        result['assigned_file_categories'] = categories
         
         return result
     
+    @classmethod
+    def cursor_sortable(cls, sort: str, filtered: bool) -> bool:
+        """Whether stream_sorted() has an index for sort, with or without filters"""
+        return sort in (cls.FILTERED_SORTABLE_FIELDS if filtered else cls.SORTABLE_FIELDS)
+    
+    @classmethod
+    def stream_sorted(cls, sort: str, order: str = 'asc', role: Optional[str] = None,
+                      status: Optional[str] = None, category_ids: Optional[List[str]] = None,
+                      search_token: Optional[str] = None,
+                      after: Optional[Tuple[Any, str]] = None, limit: Optional[int] = None,
+                      fields=None):
+        """Yield users ordered by (sort, document ID), starting after an optional
+        (sort value, document ID) cursor
+
+        Firestore allows one array filter per query, so category_ids and
+        search_token (see app.utils.search) must not be combined. With any
+        filter, sort must be one of FILTERED_SORTABLE_FIELDS (see
+        cursor_sortable()), or the query fails for lack of an index.
+        """
+        if category_ids and search_token:
+            raise ValueError("category_ids and search_token cannot be combined")
+        query = cls.get_collection()
+        if role:
+            query = query.where('role', '==', role)
+        if status:
+            query = query.where('status', '==', status)
+        if category_ids:
+            query = query.where('assigned_file_category_ids', 'array_contains_any', category_ids)
+        if search_token:
+            query = query.where('search_tokens', 'array_contains', search_token)
+        if fields:
+            query = query.select(fields)
+        direction = 'DESCENDING' if order == 'desc' else 'ASCENDING'
+        query = query.order_by(sort, direction=direction).order_by('__name__', direction=direction)
+        if after:
+            query = query.start_after({sort: after[0], '__name__': after[1]})
+        if limit:
+            query = query.limit(limit)
+        for doc in query.stream():
+            yield cls(id=doc.id, **doc.to_dict())
+    
+    def matches_search(self, term: str) -> bool:
+        """Check if an already-lowercased term occurs in email, first or last name"""
+        return any(term in (self._data.get(field) or '').lower() for field in self.SEARCH_FIELDS)
+    
+    @classmethod
+    def search(cls, term: str, fields=None):
+        """Get users whose email, first or last name contains term
+
+        Firestore narrows the read to users whose search_tokens contain the
+        first 3-gram of the term; candidates are then matched exactly. Terms
+        shorter than one 3-gram fall back to a full scan. If fields are given
+        only those are read, and they must include SEARCH_FIELDS.
+        """
+        term = term.lower()
+        token = query_token(term)
+        if token is None:
+            candidates = cls.get_all(fields=fields)
+        else:
+            query = cls.get_collection().where('search_tokens', 'array_contains', token)
+            if fields:
+                query = query.select(fields)
+            docs = query.stream()
+            candidates = (cls(id=doc.id, **doc.to_dict()) for doc in docs)
+        return [user for user in candidates if user.matches_search(term)]
+    
+    @classmethod
+    def count_assigned(cls, field: str, value: str) -> int:
+        """Count users whose array field (e.g. assigned_application_ids) contains value"""
+        results = cls.get_collection().where(field, 'array_contains', value).count().get()
+        return results[0][0].value
+    
     @classmethod
     def get_by_email(cls, email: str):
         """Get user by email"""
         users = cls.query(email=email)
         return users[0] if users else None
     
+    @staticmethod
+    def _email_claim_ref(email: str):
+        """Reference of the document that reserves an email for one user
+
+        Firestore has no unique constraints, so each user's email is also
+        written as a document keyed by the email's hash. Creating it fails if
+        another user already holds the email, which makes uniqueness part of
+        the write itself instead of a separate check.
+        """
+        key = hashlib.sha256(email.encode('utf-8')).hexdigest()
+        return get_db().collection('user_emails').document(key)
+    
+    def claim_email(self, batch):
+        """Stage the reservation of this user's email on batch (after save(batch=...))
+
+        The batch commit raises google.api_core.exceptions.AlreadyExists if
+        the email is already taken, and then none of its writes are applied.
+        """
+        batch.create(self._email_claim_ref(self.email), {'user_id': self.id})
+    
+    @classmethod
+    def release_email(cls, batch, email: str):
+        """Stage the removal of an email's reservation on batch"""
+        batch.delete(cls._email_claim_ref(email))
+    
+    @classmethod
+    def backfill_email_claims(cls) -> Tuple[int, List[str]]:
+        """Reserve the emails of users created before reservations existed
+
+        Returns how many reservations were written and the emails held by
+        more than one user (the first user seen keeps the reservation; the
+        others need manual cleanup). Safe to re-run.
+        """
+        db = get_db()
+        users = [(doc.id, doc.get('email')) for doc in cls.get_collection().select(['email']).stream()]
+        users = [(user_id, email) for user_id, email in users if email]
+        owners = {}  # reservation document ID -> user ID holding it
+        reserved = set()  # reservation document IDs already written
+        created = 0
+        conflicts = []
+        # Firestore caps a batch at 500 writes
+        for start in range(0, len(users), 500):
+            chunk = [(user_id, email, cls._email_claim_ref(email)) for user_id, email in users[start:start + 500]]
+            refs = list({ref.id: ref for _, _, ref in chunk}.values())
+            for snapshot in db.get_all(refs, field_paths=['user_id']):
+                if snapshot.exists:
+                    reserved.add(snapshot.id)
+                    owners.setdefault(snapshot.id, snapshot.get('user_id'))
+            batch = db.batch()
+            staged = []
+            for user_id, email, ref in chunk:
+                if owners.setdefault(ref.id, user_id) != user_id:
+                    conflicts.append(email)
+                elif ref.id not in reserved:
+                    reserved.add(ref.id)
+                    batch.create(ref, {'user_id': user_id})
+                    staged.append((ref, user_id))
+            if not staged:
+                continue
+            try:
+                batch.commit()
+                created += len(staged)
+            except AlreadyExists:
+                # A user was created with one of these emails meanwhile; the
+                # batch wrote nothing, so reserve one by one
+                for ref, user_id in staged:
+                    try:
+                        ref.create({'user_id': user_id})
+                        created += 1
+                    except AlreadyExists:
+                        pass
+        return created, conflicts
+    
     @classmethod
     def email_exists(cls, email: str, exclude_id: Optional[str] = None) -> bool:
-        """Check if email already exists"""
-        users = cls.query(email=email)
-        if exclude_id:
-            users = [u for u in users if u.id != exclude_id]
-        return len(users) > 0
+        """Check if email already exists (document-ID-only query, see BaseModel.exists)"""
+        return cls.exists(exclude_id=exclude_id, email=email)
     
     def get_assigned_applications(self):
         """Get assigned applications"""
@@ -119,12 +319,8 @@ class User(BaseModel):
             return []
         
         from app.models.application import Application
-        apps = []
-        for app_id in self.assigned_application_ids:
-            app = Application.get_by_id(app_id)
-            if app:
-                apps.append(app)
-        return apps
+        apps = Application.get_many(self.assigned_application_ids)
+        return [apps[app_id] for app_id in self.assigned_application_ids if app_id in apps]
     
     def assign_application(self, application_id: str):
         """Assign an application to user"""
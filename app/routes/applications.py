@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from app.models import Application, ActivityLog
 from app.schemas.application_schema import (
@@ -8,38 +8,11 @@ from app.schemas.application_schema import (
     ApplicationQuerySchema
 )
 from app.utils.validation import validate_json_body, validate_query_params
+from app.middleware.roles import superadmin_required
 
 applications_bp = Blueprint('applications', __name__, url_prefix='/api/applications')
 
 
-def require_admin():
-    """Decorator to require admin or superadmin role"""
-    claims = get_jwt()
-    role = claims.get('role', 'user')
-    if role not in ['admin', 'superadmin']:
-        return jsonify({
-            'error': {
-                'code': 'FORBIDDEN',
-                'message': 'Admin access required'
-            }
-        }), 403
-    return None
-
-
-def require_superadmin():
-    """Decorator to require superadmin role only"""
-    claims = get_jwt()
-    role = claims.get('role', 'user')
-    if role != 'superadmin':
-        return jsonify({
-            'error': {
-                'code': 'FORBIDDEN',
-                'message': 'Superadmin access required'
-            }
-        }), 403
-    return None
-
-
 def _paginate_firestore(query_results, page, per_page):
     """Helper function to paginate Firestore results"""
     total = len(query_results)
@@ -112,13 +85,10 @@ def get_applications(validated_data: ApplicationQuerySchema):
 
 @applications_bp.route('', methods=['POST'])
 @jwt_required()
+@superadmin_required
 @validate_json_body(ApplicationCreateSchema)
 def create_application(validated_data: ApplicationCreateSchema):
     """Create a new application"""
-    error = require_superadmin()
-    if error:
-        return error
-
     # Check if name already exists
     if Application.name_exists(validated_data.name):
         return jsonify({
@@ -171,13 +141,10 @@ def get_application(app_id):
 
 @applications_bp.route('/<app_id>', methods=['PUT'])
 @jwt_required()
+@superadmin_required
 @validate_json_body(ApplicationUpdateSchema)
 def update_application(app_id, validated_data: ApplicationUpdateSchema):
     """Update an application"""
-    error = require_superadmin()
-    if error:
-        return error
-
     application = Application.get_by_id(app_id)
     if not application:
         return jsonify({
@@ -228,12 +195,9 @@ def update_application(app_id, validated_data: ApplicationUpdateSchema):
 
 @applications_bp.route('/<app_id>', methods=['DELETE'])
 @jwt_required()
+@superadmin_required
 def delete_application(app_id):
     """Delete an application"""
-    error = require_superadmin()
-    if error:
-        return error
-
     application = Application.get_by_id(app_id)
     if not application:
         return jsonify({
@@ -1,11 +1,15 @@
-from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from datetime import datetime
+from flask import Blueprint, request, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from urllib.parse import urlparse, urlunparse
 import requests
-from typing import List, Set
+import threading
+import time
+from typing import Callable, Dict, List, Set, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from google.api_core.exceptions import NotFound
 from app.models import FileCategory, ActivityLog
+from app.db import write_with_audit
+from app.utils.background_tasks import enqueue_activity
 from app.schemas.file_category_schema import (
     FileCategoryCreateSchema,
     FileCategoryUpdateSchema,
@@ -13,6 +17,9 @@ from app.schemas.file_category_schema import (
     FetchCategoriesFromApplicationsSchema
 )
 from app.utils.validation import validate_json_body, validate_query_params
+from app.utils.json_response import ojsonify, dumps, json_body_response
+from app.utils.http_client import get_http_session
+from app.middleware.roles import superadmin_required
 
 file_categories_bp = Blueprint('file_categories', __name__, url_prefix='/api/file-categories')
 
@@ -30,50 +37,61 @@ VALID_CATEGORIES = [
     "OTHER"
 ]
 
+# Serialized list responses, keyed by query. Categories change rarely and
+# every write in this blueprint clears the cache, so a short TTL only
+# bounds staleness from writes made elsewhere (e.g. user assignments).
+LIST_CACHE_TTL = 30
+LIST_CACHE_MAX_ENTRIES = 256
+_list_cache: Dict[Tuple, Tuple[float, bytes]] = {}
+_list_inflight: Dict[Tuple, threading.Event] = {}
+_list_cache_lock = threading.Lock()
+_list_cache_generation = 0
 
-def require_admin():
-    """Decorator to require admin or superadmin role"""
-    claims = get_jwt()
-    role = claims.get('role', 'user')
-    if role not in ['admin', 'superadmin']:
-        return jsonify({
-            'error': {
-                'code': 'FORBIDDEN',
-                'message': 'Admin access required'
-            }
-        }), 403
-    return None
 
+def _cached_body(key: Tuple, build: Callable[[], bytes]) -> bytes:
+    """Return the cached body for key, building it on a miss
 
-def require_superadmin():
-    """Decorator to require superadmin role only"""
-    claims = get_jwt()
-    role = claims.get('role', 'user')
-    if role != 'superadmin':
-        return jsonify({
-            'error': {
-                'code': 'FORBIDDEN',
-                'message': 'Superadmin access required'
-            }
-        }), 403
-    return None
-
-
-def _paginate_firestore(query_results, page, per_page):
-    """Helper function to paginate Firestore results"""
-    total = len(query_results)
-    start = (page - 1) * per_page
-    end = start + per_page
-    items = query_results[start:end]
-    pages = (total + per_page - 1) // per_page
-    
-    return {
-        'items': items,
-        'total': total,
-        'pages': pages,
-        'has_next': end < total,
-        'has_prev': page > 1
-    }
+    Concurrent misses for the same key wait for the first request's build
+    instead of all querying Firestore.
+    """
+    while True:
+        with _list_cache_lock:
+            entry = _list_cache.get(key)
+            if entry and time.monotonic() < entry[0]:
+                return entry[1]
+            event = _list_inflight.get(key)
+            leader = event is None
+            if leader:
+                event = _list_inflight[key] = threading.Event()
+                generation = _list_cache_generation
+        if not leader:
+            event.wait()
+            continue
+        try:
+            body = build()
+            with _list_cache_lock:
+                # Don't cache a body built from data a concurrent write replaced
+                if generation == _list_cache_generation:
+                    now = time.monotonic()
+                    if len(_list_cache) >= LIST_CACHE_MAX_ENTRIES:
+                        for stale in [k for k, (expires, _) in _list_cache.items() if expires <= now]:
+                            del _list_cache[stale]
+                        if len(_list_cache) >= LIST_CACHE_MAX_ENTRIES:
+                            _list_cache.clear()
+                    _list_cache[key] = (now + LIST_CACHE_TTL, body)
+            return body
+        finally:
+            with _list_cache_lock:
+                _list_inflight.pop(key, None)
+            event.set()
+
+
+def _invalidate_list_cache():
+    """Drop cached list responses after a write"""
+    global _list_cache_generation
+    with _list_cache_lock:
+        _list_cache.clear()
+        _list_cache_generation += 1
 
 
 @file_categories_bp.route('', methods=['GET'])
@@ -81,65 +99,52 @@ def _paginate_firestore(query_results, page, per_page):
 @validate_query_params(FileCategoryQuerySchema)
 def get_file_categories(validated_data: FileCategoryQuerySchema):
     """Get all file categories with pagination and filtering"""
-    # Get all file categories
-    all_categories = FileCategory.get_all()
+    status = validated_data.status
+    sort_field = validated_data.sort if validated_data.sort in FileCategory.SORTABLE_FIELDS else 'code'
+    order = validated_data.order
     
-    # Apply filters
-    filtered_categories = all_categories
-    
-    # Search filter
-    if validated_data.search:
-        search_term = validated_data.search.lower()
-        filtered_categories = [
-            cat for cat in filtered_categories
-            if (hasattr(cat, 'code') and search_term in cat.code.lower()) or
-               (hasattr(cat, 'name') and cat.name and search_term in cat.name.lower()) or
-               (hasattr(cat, 'description') and cat.description and search_term in cat.description.lower())
-        ]
-    
-    # Status filter
-    if validated_data.status:
-        filtered_categories = [cat for cat in filtered_categories if hasattr(cat, 'status') and cat.status == validated_data.status]
-    
-    # Sorting
-    sort_field = validated_data.sort
-    reverse = validated_data.order == 'desc'
-    
-    def get_sort_value(cat):
-        if hasattr(cat, sort_field):
-            value = getattr(cat, sort_field)
-            if isinstance(value, datetime):
-                return value.timestamp() if value else 0
-            return value if value else ''
-        return ''
+    page = validated_data.page
+    per_page = validated_data.per_page
+    start = (page - 1) * per_page
+    end = start + per_page
     
-    filtered_categories.sort(key=get_sort_value, reverse=reverse)
+    def build():
+        if validated_data.search:
+            # Firestore narrows candidates via the search_tokens index; exact
+            # substring matching and ordering of the matches happen in the model
+            matches = FileCategory.search(validated_data.search, status=status, sort=sort_field, order=order)
+            total = len(matches)
+            items = matches[start:end]
+        else:
+            # Filter, order and page entirely in Firestore
+            items = FileCategory.get_all(
+                status=status, sort=sort_field, order=order,
+                offset=start, limit=per_page
+            )
+            total = FileCategory.get_count(status=status)
+        
+        return dumps({
+            'file_categories': [cat.to_dict() for cat in items],
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': total,
+                'pages': (total + per_page - 1) // per_page,
+                'has_next': end < total,
+                'has_prev': page > 1
+            }
+        })
     
-    # Pagination
-    pagination = _paginate_firestore(filtered_categories, validated_data.page, validated_data.per_page)
-
-    return jsonify({
-        'file_categories': [cat.to_dict() for cat in pagination['items']],
-        'pagination': {
-            'page': validated_data.page,
-            'per_page': validated_data.per_page,
-            'total': pagination['total'],
-            'pages': pagination['pages'],
-            'has_next': pagination['has_next'],
-            'has_prev': pagination['has_prev']
-        }
-    }), 200
+    key = ('list', status, sort_field, order, page, per_page, validated_data.search)
+    return json_body_response(_cached_body(key, build), 200)
 
 
 @file_categories_bp.route('', methods=['POST'])
 @jwt_required()
+@superadmin_required
 @validate_json_body(FileCategoryCreateSchema)
 def create_file_category(validated_data: FileCategoryCreateSchema):
     """Create a new file category"""
-    error = require_superadmin()
-    if error:
-        return error
-
     # Determine code: use provided code or generate from name
     if validated_data.code:
         # Normalize provided code to uppercase
@@ -147,22 +152,22 @@ def create_file_category(validated_data: FileCategoryCreateSchema):
     else:
         # Generate code from name: uppercase and replace spaces with underscores
         if not validated_data.name:
-            return jsonify({
+            return ojsonify({
                 'error': {
                     'code': 'VALIDATION_ERROR',
                     'message': 'Either code or name must be provided'
                 }
-            }), 400
+            }, 400)
         code = validated_data.name.upper().replace(' ', '_')
     
     # Check if code already exists
     if FileCategory.code_exists(code):
-        return jsonify({
+        return ojsonify({
             'error': {
                 'code': 'CATEGORY_EXISTS',
                 'message': 'A file category with this code already exists'
             }
-        }), 409
+        }, 409)
 
     # Create file category
     file_category = FileCategory(
@@ -172,9 +177,8 @@ def create_file_category(validated_data: FileCategoryCreateSchema):
         status=validated_data.status,
         short_code=validated_data.short_code if validated_data.short_code is not None else []
     )
-    file_category.save()
 
-    # Log activity
+    # Log activity (committed together with the category)
     current_user_id = get_jwt_identity()
     activity = ActivityLog(
         event_type='file_category_created',
@@ -182,12 +186,13 @@ def create_file_category(validated_data: FileCategoryCreateSchema):
         description=f'Created file category: {file_category.code}',
         ip_address=request.remote_addr
     )
-    activity.save()
+    write_with_audit(file_category, activity)
+    _invalidate_list_cache()
 
-    return jsonify({
+    return ojsonify({
         'message': 'File category created successfully',
         'file_category': file_category.to_dict()
-    }), 201
+    }, 201)
 
 @file_categories_bp.route('/<category_id>', methods=['GET'])
 @jwt_required()
@@ -195,33 +200,30 @@ def get_file_category(category_id):
     """Get a specific file category by ID"""
     file_category = FileCategory.get_by_id(category_id)
     if not file_category:
-        return jsonify({
+        return ojsonify({
             'error': {
                 'code': 'CATEGORY_NOT_FOUND',
                 'message': f'File category with id {category_id} not found'
             }
-        }), 404
+        }, 404)
 
-    return jsonify(file_category.to_dict()), 200
+    return ojsonify(file_category.to_dict(), 200)
 
 
 @file_categories_bp.route('/<category_id>', methods=['PUT'])
 @jwt_required()
+@superadmin_required
 @validate_json_body(FileCategoryUpdateSchema)
 def update_file_category(category_id, validated_data: FileCategoryUpdateSchema):
     """Update a file category"""
-    error = require_superadmin()
-    if error:
-        return error
-
     file_category = FileCategory.get_by_id(category_id)
     if not file_category:
-        return jsonify({
+        return ojsonify({
             'error': {
                 'code': 'CATEGORY_NOT_FOUND',
                 'message': f'File category with id {category_id} not found'
             }
-        }), 404
+        }, 404)
 
     # Update fields
     if validated_data.code:
@@ -229,12 +231,12 @@ def update_file_category(category_id, validated_data: FileCategoryUpdateSchema):
         code = validated_data.code.upper()
         # Check if new code already exists
         if FileCategory.code_exists(code, exclude_id=category_id):
-            return jsonify({
+            return ojsonify({
                 'error': {
                     'code': 'CATEGORY_EXISTS',
                     'message': 'A file category with this code already exists'
                 }
-            }), 409
+            }, 409)
         file_category.code = code
 
     if validated_data.name is not None:
@@ -249,9 +251,7 @@ def update_file_category(category_id, validated_data: FileCategoryUpdateSchema):
     if validated_data.short_code is not None:
         file_category.short_code = validated_data.short_code
 
-    file_category.save()
-
-    # Log activity
+    # Log activity (committed together with the update)
     current_user_id = get_jwt_identity()
     activity = ActivityLog(
         event_type='file_category_updated',
@@ -259,68 +259,65 @@ def update_file_category(category_id, validated_data: FileCategoryUpdateSchema):
         description=f'Updated file category: {file_category.code}',
         ip_address=request.remote_addr
     )
-    activity.save()
+    write_with_audit(file_category, activity)
+    _invalidate_list_cache()
 
-    return jsonify({
+    return ojsonify({
         'message': 'File category updated successfully',
         'file_category': file_category.to_dict()
-    }), 200
+    }, 200)
 
 
 @file_categories_bp.route('/<category_id>', methods=['DELETE'])
 @jwt_required()
+@superadmin_required
 def delete_file_category(category_id):
     """Delete a file category"""
-    error = require_superadmin()
-    if error:
-        return error
-
-    file_category = FileCategory.get_by_id(category_id)
-    if not file_category:
-        return jsonify({
-            'error': {
-                'code': 'CATEGORY_NOT_FOUND',
-                'message': f'File category with id {category_id} not found'
-            }
-        }), 404
+    # No pre-read: the delete carries an exists precondition instead, and a
+    # missing category surfaces as NotFound below
+    file_category = FileCategory(id=category_id)
 
     # Check if category is assigned to any users
     user_count = file_category.get_user_count()
     if user_count > 0:
-        return jsonify({
+        return ojsonify({
             'error': {
                 'code': 'CATEGORY_IN_USE',
                 'message': f'Cannot delete file category. It is assigned to {user_count} user(s). Please unassign it from all users first.'
             }
-        }), 400
+        }, 400)
 
-    code = file_category.code
-    file_category.delete()
-
-    # Log activity
+    # Log activity (committed together with the delete)
     current_user_id = get_jwt_identity()
     activity = ActivityLog(
         event_type='file_category_deleted',
         user_id=current_user_id,
-        description=f'Deleted file category: {code}',
+        description=f'Deleted file category: {category_id}',
         ip_address=request.remote_addr
     )
-    activity.save()
+    try:
+        write_with_audit(file_category, activity, delete=True, must_exist=True)
+        _invalidate_list_cache()
+    except NotFound:
+        return ojsonify({
+            'error': {
+                'code': 'CATEGORY_NOT_FOUND',
+                'message': f'File category with id {category_id} not found'
+            }
+        }, 404)
 
-    return jsonify({
+    return ojsonify({
         'message': 'File category deleted successfully'
-    }), 200
+    }, 200)
 
 
 @file_categories_bp.route('/all', methods=['DELETE'])
 @jwt_required()
+@superadmin_required
 def delete_all_file_categories():
     """Delete all file categories (Superadmin only)"""
-    error = require_superadmin()
-    if error:
-        return error
-
     total_deleted = FileCategory.delete_all()
+    _invalidate_list_cache()
 
     # Log activity
     current_user_id = get_jwt_identity()
@@ -330,11 +327,11 @@ def delete_all_file_categories():
         description=f'Deleted all file categories ({total_deleted})',
         ip_address=request.remote_addr
     )
-    activity.save()
+    enqueue_activity(activity)
 
-    return jsonify({
+    return ojsonify({
         'message': f'Successfully deleted {total_deleted} file categories'
-    }), 200
+    }, 200)
 
 
 def _convert_to_backend_url(application_url: str) -> str:
@@ -358,7 +355,8 @@ def _convert_to_backend_url(application_url: str) -> str:
         raise ValueError(f"Invalid URL format: {application_url}. Error: {str(e)}")
 
 
-def _fetch_categories_from_backend(backend_url: str, auth_token: str = None, timeout: int = 10) -> List[str]:
+def _fetch_categories_from_backend(backend_url: str, auth_token: str = None, timeout: int = 10,
+                                  session: requests.Session = None) -> List[str]:
     """
     Fetch categories from a backend URL.
     Uses the endpoint: /backend/api/v2/system/categories
@@ -368,6 +366,8 @@ def _fetch_categories_from_backend(backend_url: str, auth_token: str = None, tim
         backend_url: The base backend URL
         auth_token: JWT token for authentication (optional)
         timeout: Request timeout in seconds
+        session: Session to send the request with (pooled connections); a
+            one-off connection is used if not given
     """
     try:
         categories_url = f"{backend_url.rstrip('/')}/backend/api/v2/system/categories"
@@ -383,7 +383,7 @@ def _fetch_categories_from_backend(backend_url: str, auth_token: str = None, tim
             headers['Authorization'] = f'Bearer {auth_token}'
         
         # Make request to fetch categories
-        response = requests.get(
+        response = (session or requests).get(
             categories_url,
             timeout=timeout,
             headers=headers
@@ -440,12 +440,15 @@ def fetch_categories_from_applications(validated_data: FetchCategoriesFromApplic
     # Track unique categories using a set (case-insensitive)
     unique_categories: Set[str] = set()
     
-    # Parallelize backend requests for faster response
+    # Parallelize backend requests for faster response, reusing pooled
+    # keep-alive connections across requests
+    session = get_http_session()
+    
     def fetch_from_url(app_url: str):
         """Helper function to fetch categories from a single URL"""
         try:
             backend_url = _convert_to_backend_url(app_url)
-            categories = _fetch_categories_from_backend(backend_url, auth_token=auth_token)
+            categories = _fetch_categories_from_backend(backend_url, auth_token=auth_token, session=session)
             return app_url, categories, None
         except Exception as e:
             return app_url, [], str(e)
@@ -525,7 +528,7 @@ def fetch_categories_from_applications(validated_data: FetchCategoriesFromApplic
     if errors:
         response_data['errors'] = errors
     
-    return jsonify(response_data), 200
+    return ojsonify(response_data, 200)
 
 
 @file_categories_bp.route('/all', methods=['GET'])
@@ -535,36 +538,34 @@ def get_all_categories_api_key():
     api_key = request.headers.get('X-API-Key') or request.headers.get('Authorization', '').replace('Bearer ', '')
     
     if not api_key:
-        return jsonify({
+        return ojsonify({
             'error': {
                 'code': 'UNAUTHORIZED',
                 'message': 'API key is required. Provide it in X-API-Key header or Authorization header.'
             }
-        }), 401
+        }, 401)
     
     # Validate API key against JWT_SECRET_KEY
     jwt_secret = current_app.config.get('JWT_SECRET_KEY')
     if api_key != jwt_secret:
-        return jsonify({
+        return ojsonify({
             'error': {
                 'code': 'UNAUTHORIZED',
                 'message': 'Invalid API key'
             }
-        }), 401
+        }, 401)
     
-    # Get all file categories
-    all_categories = FileCategory.get_all()
-    
-    # Return simplified response with only name, code, and short_code
-    categories_list = []
-    for category in all_categories:
-        categories_list.append({
-            'name': category.name if hasattr(category, 'name') and category.name else category.code,
-            'code': category.code,
-            'short_code': category.short_code if hasattr(category, 'short_code') and category.short_code else []
+    def build():
+        # Return simplified response with only name, code, and short_code
+        categories_list = []
+        for category in FileCategory.get_all():
+            categories_list.append({
+                'name': category.name if hasattr(category, 'name') and category.name else category.code,
+                'code': category.code,
+                'short_code': category.short_code if hasattr(category, 'short_code') and category.short_code else []
+            })
+        return dumps({
+            'categories': categories_list
         })
     
-    return jsonify({
-        'categories': categories_list
-    }), 200
-
+    return json_body_response(_cached_body(('all',), build), 200)
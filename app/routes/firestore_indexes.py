@@ -3,37 +3,151 @@ Firestore Index Management API
 Provides endpoints to create and manage Firestore indexes programmatically
 """
 import os
-import json
-from flask import Blueprint, jsonify, current_app, request
-from flask_jwt_extended import jwt_required, get_jwt
-from typing import Dict, Any
+import functools
+import threading
+from collections import deque
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import orjson
+from jsonschema import Draft202012Validator
+from flask import Blueprint, current_app, request
+from flask_jwt_extended import jwt_required
+from typing import Dict, Any, List, Tuple
 import firebase_admin
+import google.auth
+from google.oauth2 import service_account
+from google.api_core.exceptions import AlreadyExists, GoogleAPICallError
+from google.cloud.firestore_admin_v1 import FirestoreAdminClient, Index
+from app.utils.json_response import ojsonify
+from app.middleware.roles import superadmin_required
 
 firestore_indexes_bp = Blueprint('firestore_indexes', __name__, url_prefix='/api/firestore/indexes')
 
+# Upper bound on concurrent index-creation calls to the Firestore Admin API
+INDEX_CREATE_MAX_WORKERS = 8
 
-def require_superadmin():
-    """Decorator to require superadmin role"""
-    claims = get_jwt()
-    role = claims.get('role', 'user')
-    if role != 'superadmin':
-        return jsonify({'error': 'Superadmin access required'}), 403
-    return None
+# Firebase CLI deploy limits: seconds before the process is killed, and how
+# many trailing output lines are returned to the caller
+FIREBASE_CLI_TIMEOUT = 300
+FIREBASE_CLI_OUTPUT_LINES = 200
+
+# Keys of a firestore.indexes.json field entry that are passed to the Admin API
+_ALLOWED_FIELD_KEYS = ('fieldPath', 'order', 'arrayConfig')
+
+_ADMIN_SCOPES = ['https://www.googleapis.com/auth/datastore', 'https://www.googleapis.com/auth/cloud-platform']
+# Guards the one-time construction of the admin client
+_admin_lock = threading.Lock()
+
+# Structure of firestore.indexes.json, compiled once at import
+_INDEXES_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'indexes': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'required': ['collectionGroup', 'fields'],
+                'properties': {
+                    'collectionGroup': {'type': 'string'},
+                    'queryScope': {'enum': ['COLLECTION', 'COLLECTION_GROUP']},
+                    'fields': {
+                        'type': 'array',
+                        'minItems': 1,
+                        'items': {
+                            'type': 'object',
+                            'required': ['fieldPath'],
+                            'properties': {
+                                'fieldPath': {'type': 'string'},
+                                'order': {'enum': ['ASCENDING', 'DESCENDING']},
+                                'arrayConfig': {'enum': ['CONTAINS']}
+                            },
+                            'anyOf': [{'required': ['order']}, {'required': ['arrayConfig']}]
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+_INDEXES_VALIDATOR = Draft202012Validator(_INDEXES_SCHEMA)
+
+
+# firestore.indexes.json in the project root (3 levels up from app/routes/)
+_INDEX_FILE_PATH = Path(__file__).resolve().parents[2] / 'firestore.indexes.json'
+
+# Parsed firestore.indexes.json, reused until the file's mtime changes
+_cache = {'mtime': None, 'data': None}
 
 
 def load_indexes_file() -> Dict[str, Any]:
-    """Load firestore.indexes.json file"""
-    # Get project root directory (3 levels up from app/routes/)
-    project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-    indexes_file = os.path.join(project_root, 'firestore.indexes.json')
+    """Load firestore.indexes.json file (cached, invalidated on mtime change)
+
+    The returned dict is shared between requests and must not be mutated.
+    """
+    try:
+        mtime = _INDEX_FILE_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"firestore.indexes.json file not found at {_INDEX_FILE_PATH}")
     
-    if not os.path.exists(indexes_file):
-        raise FileNotFoundError(f"firestore.indexes.json file not found at {indexes_file}")
+    if _cache['mtime'] == mtime:
+        return _cache['data']
     
-    with open(indexes_file, 'r') as f:
-        return json.load(f)
+    data = orjson.loads(_INDEX_FILE_PATH.read_bytes())
+    _cache['mtime'] = mtime
+    _cache['data'] = data
+    return data
 
 
+@functools.lru_cache(maxsize=1)
+def _build_admin() -> Tuple[FirestoreAdminClient, str]:
+    """Load Google credentials and build the Firestore Admin client"""
+    # Get credentials (use the same logic as in db.py or rely on ADC)
+    try:
+        # Get credentials path from environment (same as db.py)
+        credentials_path = os.environ.get('FIREBASE_CREDENTIALS_PATH', 'shothik-project-2cc7a51b6844.json')
+        
+        # Try to load from service account file first (like db.py does)
+        if os.path.exists(credentials_path):
+            # Load credentials from the JSON file with required scopes
+            credentials = service_account.Credentials.from_service_account_file(
+                credentials_path,
+                scopes=_ADMIN_SCOPES
+            )
+            # The service account file carries the project_id
+            project_id = credentials.project_id
+        else:
+            # Fall back to Application Default Credentials if file doesn't exist
+            credentials, project_id = google.auth.default(scopes=_ADMIN_SCOPES)
+    except Exception as e:
+        raise RuntimeError(f"Failed to get Google Cloud credentials: {str(e)}") from e
+    
+    # Ensure project_id is available
+    if not project_id:
+        # Try to get from Firebase app as last resort
+        try:
+            firebase_app = firebase_admin.get_app()
+            project_id = firebase_app.project_id
+        except ValueError:
+            pass  # Firebase app not initialized
+    
+    if not project_id:
+        raise RuntimeError("Could not determine Google Cloud project ID.")
+    
+    # Build the Firestore Admin API client
+    try:
+        # gRPC client (protobuf over HTTP/2); safe to share between threads
+        return FirestoreAdminClient(credentials=credentials), project_id
+    except Exception as e:
+        raise RuntimeError(f"Failed to build Firestore Admin API client: {str(e)}") from e
+
+
+def _get_admin() -> Tuple[FirestoreAdminClient, str]:
+    """Return the process-wide (FirestoreAdminClient, project_id) pair
+
+    Built on first use; failures are not cached, so a later call retries.
+    """
+    with _admin_lock:
+        return _build_admin()
 
 
 def create_indexes_using_firebase_cli() -> Dict[str, Any]:
@@ -56,21 +170,45 @@ def create_indexes_using_firebase_cli() -> Dict[str, Any]:
         if result.returncode != 0:
             raise Exception("Firebase CLI not found. Install it with: npm install -g firebase-tools")
         
-        # Deploy indexes using Firebase CLI
-        result = subprocess.run(
+        # Deploy indexes using Firebase CLI, streaming its output line by line
+        # so progress is logged as it happens and only the tail is kept
+        process = subprocess.Popen(
             ['firebase', 'deploy', '--only', 'firestore:indexes'],
-            capture_output=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
             text=True,
-            timeout=300  # 5 minute timeout
+            bufsize=1
         )
-        
-        if result.returncode != 0:
-            raise Exception(f"Firebase CLI error: {result.stderr}")
+        timed_out = threading.Event()
+
+        def _kill_on_timeout():
+            timed_out.set()
+            process.kill()
+
+        timer = threading.Timer(FIREBASE_CLI_TIMEOUT, _kill_on_timeout)  # 5 minute timeout
+        timer.start()
+        output = deque(maxlen=FIREBASE_CLI_OUTPUT_LINES)
+        try:
+            for line in process.stdout:
+                line = line.rstrip('\n')
+                current_app.logger.info(f"firebase: {line}")
+                output.append(line)
+            returncode = process.wait()
+        finally:
+            timer.cancel()
+            process.stdout.close()
+
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(process.args, FIREBASE_CLI_TIMEOUT)
+
+        output = '\n'.join(output)
+        if returncode != 0:
+            raise Exception(f"Firebase CLI error: {output}")
         
         return {
             'status': 'success',
             'method': 'firebase_cli',
-            'output': result.stdout
+            'output': output
         }
         
     except FileNotFoundError:
@@ -84,304 +222,245 @@ def create_indexes_using_firebase_cli() -> Dict[str, Any]:
         raise Exception(f"Failed to create indexes via Firebase CLI: {str(e)}")
 
 
+def _describe_field(field: Dict[str, str]) -> str:
+    """Short label for an index field, used in logs and results"""
+    if 'order' in field:
+        return f"{field['fieldPath']} {field['order']}"
+    return f"{field['fieldPath']} ARRAY_CONTAINS"
+
+
+def _to_index_field(field: Dict[str, str]) -> Index.IndexField:
+    """Convert a firestore.indexes.json field entry to an Index.IndexField proto"""
+    if "arrayConfig" in field:
+        return Index.IndexField(
+            field_path=field["fieldPath"],
+            array_config=Index.IndexField.ArrayConfig[field["arrayConfig"]]
+        )
+    if "order" in field:
+        return Index.IndexField(
+            field_path=field["fieldPath"],
+            order=Index.IndexField.Order[field["order"]]
+        )
+    return Index.IndexField(field_path=field["fieldPath"])
+
+
+def _describe_schema_error(error) -> str:
+    """Turn a jsonschema error into an "Index i, field j: ..." message"""
+    path = list(error.absolute_path)
+    location = 'Configuration'
+    if len(path) >= 2 and path[0] == 'indexes':
+        location = f"Index {path[1]}"
+        if len(path) >= 4 and path[2] == 'fields':
+            location += f", field {path[3]}"
+    
+    if error.validator == 'required':
+        missing = [key for key in error.validator_value if key not in error.instance]
+        if missing == ['fields']:
+            return f"{location}: missing or empty 'fields' array"
+        return f"{location}: missing {', '.join(repr(key) for key in missing)}"
+    if error.validator == 'minItems' and path[-1:] == ['fields']:
+        return f"{location}: missing or empty 'fields' array"
+    if error.validator == 'anyOf':
+        return f"{location}: must have either 'order' or 'arrayConfig'"
+    if error.validator == 'enum':
+        allowed = ' or '.join(repr(value) for value in error.validator_value)
+        return f"{location}: '{path[-1]}' must be {allowed}"
+    return f"{location}: {error.message}"
+
+
+def validate_indexes_config(indexes_config: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """Validate a firestore.indexes.json document, returning (errors, warnings)"""
+    errors = [_describe_schema_error(e) for e in _INDEXES_VALIDATOR.iter_errors(indexes_config)]
+    
+    warnings = []
+    for idx, index_config in enumerate(indexes_config.get('indexes', [])):
+        for field_idx, field_config in enumerate(index_config.get('fields', [])):
+            if 'order' in field_config and 'arrayConfig' in field_config:
+                warnings.append(
+                    f"Index {idx}, field {field_idx}: has both 'order' and 'arrayConfig', 'arrayConfig' will be used"
+                )
+    return errors, warnings
+
+
 @firestore_indexes_bp.route('', methods=['GET'])
 @jwt_required()
+@superadmin_required
 def get_indexes_config():
     """Get the current indexes configuration from firestore.indexes.json"""
-    # Check permissions
-    auth_error = require_superadmin()
-    if auth_error:
-        return auth_error
-    
     try:
         indexes_config = load_indexes_file()
-        return jsonify({
+        return ojsonify({
             'status': 'success',
             'indexes': indexes_config.get('indexes', []),
             'total': len(indexes_config.get('indexes', []))
-        }), 200
+        }, 200)
     except FileNotFoundError as e:
-        return jsonify({'error': str(e)}), 404
+        return ojsonify({'error': str(e)}, 404)
     except Exception as e:
         current_app.logger.error(f"Error loading indexes config: {str(e)}")
-        return jsonify({'error': f'Failed to load indexes configuration: {str(e)}'}), 500
+        return ojsonify({'error': f'Failed to load indexes configuration: {str(e)}'}, 500)
 
 
 @firestore_indexes_bp.route('/create', methods=['POST', 'OPTIONS'])
 @jwt_required(optional=True)  # Allow OPTIONS request to proceed, POST will require valid token implicitly
+@superadmin_required
 def create_indexes():
     """
     Attempts to create Firestore composite indexes programmatically using the Admin API.
     """
     # Handle OPTIONS preflight request (Flask-CORS should handle this)
     if request.method == 'OPTIONS':
-        return jsonify({"status": "OK"}), 200
+        return ojsonify({"status": "OK"}, 200)
     
     # If we reach here for a POST request, @jwt_required(optional=True) allowed it.
     # We rely on the frontend sending a valid token for POST requests.
     # A missing/invalid token would result in an error handled by Flask-JWT-Extended earlier.
     
-    # Check permissions for POST requests
-    auth_error = require_superadmin()
-    if auth_error:
-        return auth_error
-    
     # --- Proceed with POST logic ---
-    # Construct the path to firestore.indexes.json relative to the app's root
-    backend_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
-    index_file_path = os.path.join(backend_root, 'firestore.indexes.json')
-    
-    if not os.path.exists(index_file_path):
-        return jsonify({"status": "Error", "message": f"Index file not found at {index_file_path}"}), 404
-    
     try:
-        with open(index_file_path, 'r') as f:
-            index_config = json.load(f)
+        index_config = load_indexes_file()
+    except FileNotFoundError:
+        return ojsonify({"status": "Error", "message": f"Index file not found at {_INDEX_FILE_PATH}"}, 404)
     except Exception as e:
-        return jsonify({"status": "Error", "message": f"Failed to read or parse index file: {str(e)}"}), 500
+        return ojsonify({"status": "Error", "message": f"Failed to read or parse index file: {str(e)}"}, 500)
     
     indexes_to_create = index_config.get("indexes", [])
     
     if not indexes_to_create:
-        return jsonify({"status": "Info", "message": "No composite indexes defined in firestore.indexes.json."}), 200
+        return ojsonify({"status": "Info", "message": "No composite indexes defined in firestore.indexes.json."}, 200)
     
-    # Get credentials (use the same logic as in db.py or rely on ADC)
+    # Credentials and the admin client are built once per process
     try:
-        import google.auth
-        from google.oauth2 import service_account
-        from googleapiclient.discovery import build
-        from googleapiclient.errors import HttpError
-        
-        # Get credentials path from environment (same as db.py)
-        credentials_path = os.environ.get('FIREBASE_CREDENTIALS_PATH', 'shothik-project-2cc7a51b6844.json')
-        
-        # Try to load from service account file first (like db.py does)
-        if os.path.exists(credentials_path):
-            # Load credentials from the JSON file with required scopes
-            credentials = service_account.Credentials.from_service_account_file(
-                credentials_path,
-                scopes=['https://www.googleapis.com/auth/datastore', 'https://www.googleapis.com/auth/cloud-platform']
-            )
-            # Get project_id from the credentials file
-            with open(credentials_path, 'r') as f:
-                creds_data = json.load(f)
-                project_id = creds_data.get('project_id')
-        else:
-            # Fall back to Application Default Credentials if file doesn't exist
-            credentials, project_id = google.auth.default(
-                scopes=['https://www.googleapis.com/auth/datastore', 'https://www.googleapis.com/auth/cloud-platform']
-            )
-        
-        # Ensure project_id is available
-        if not project_id:
-            # Try to get from Firebase app as last resort
-            try:
-                firebase_app = firebase_admin.get_app()
-                project_id = firebase_app.project_id
-            except ValueError:
-                pass  # Firebase app not initialized
-        
-        if not project_id:
-            return jsonify({"status": "Error", "message": "Could not determine Google Cloud project ID."}), 500
-            
-    except ImportError as e:
-        current_app.logger.error(f"ERROR: Missing required libraries: {e}")
-        return jsonify({
-            "status": "Error", 
-            "message": f"Missing required libraries: {str(e)}. Install with: pip install google-api-python-client google-auth"
-        }), 500
-    except Exception as e:
-        current_app.logger.error(f"ERROR: Failed to get credentials: {e}")
-        return jsonify({"status": "Error", "message": f"Failed to get Google Cloud credentials: {str(e)}"}), 500
+        firestore_admin, project_id = _get_admin()
+    except RuntimeError as e:
+        current_app.logger.error(f"ERROR: {e}")
+        return ojsonify({"status": "Error", "message": str(e)}, 500)
     
-    # Build the Firestore Admin API client
-    try:
-        # Use version v1 for index management
-        firestore_admin = build('firestore', 'v1', credentials=credentials, cache_discovery=False)
-        
-        # Use the configured database ID from environment
-        database_name = os.environ.get('FIRESTORE_DATABASE_NAME', '(default)')
-        database_id = database_name if database_name != '(default)' else '(default)'
-        parent = f"projects/{project_id}/databases/{database_id}/collectionGroups"
-        
-        current_app.logger.info(f"Using Firestore Admin API parent path: {parent}")  # Log the path being used
-    except Exception as e:
-        current_app.logger.error(f"ERROR: Failed to build Firestore Admin API client: {e}")
-        return jsonify({"status": "Error", "message": f"Failed to build Firestore Admin API client: {str(e)}"}), 500
+    # Use the configured database ID from environment
+    database_name = os.environ.get('FIRESTORE_DATABASE_NAME', '(default)')
+    database_id = database_name if database_name != '(default)' else '(default)'
+    parent = f"projects/{project_id}/databases/{database_id}/collectionGroups"
+    
+    current_app.logger.info(f"Using Firestore Admin API parent path: {parent}")  # Log the path being used
     
-    results = []
+    results = [None] * len(indexes_to_create)
     has_errors = False
+    pending = []  # (position, index_name_str, collection_parent, index)
     
-    for index_def in indexes_to_create:
+    for position, index_def in enumerate(indexes_to_create):
         collection_id = index_def.get("collectionGroup")
         if not collection_id:
-            results.append({"index": "Unknown", "status": "Skipped", "detail": "Missing 'collectionGroup' in definition."})
+            results[position] = {"index": "Unknown", "status": "Skipped", "detail": "Missing 'collectionGroup' in definition."}
             has_errors = True
             continue
         
-        # Construct the body for the API request
-        # Map fields from JSON to API format
-        api_fields = []
-        for field in index_def.get("fields", []):
-            api_field = {}
-            if "fieldPath" in field:
-                api_field["fieldPath"] = field["fieldPath"]
-            if "order" in field:
-                api_field["order"] = field["order"]
-            # Add support for arrayConfig
-            if "arrayConfig" in field:
-                api_field["arrayConfig"] = field["arrayConfig"]
-            
-            if api_field:
-                api_fields.append(api_field)
+        # Map fields from JSON to API format, keeping only the known keys
+        api_fields = [
+            api_field for api_field in (
+                {key: field[key] for key in _ALLOWED_FIELD_KEYS if key in field}
+                for field in index_def.get("fields", ())
+            ) if api_field
+        ]
         
         if not api_fields:
-            results.append({"index": collection_id, "status": "Skipped", "detail": "No valid 'fields' defined for index."})
+            results[position] = {"index": collection_id, "status": "Skipped", "detail": "No valid 'fields' defined for index."}
             has_errors = True
             continue
         
-        index_body = {
-            "queryScope": index_def.get("queryScope", "COLLECTION"),  # Default to COLLECTION
-            "fields": api_fields
-        }
-        
-        index_name_str = f"{collection_id} ({', '.join([f['fieldPath']+' '+f.get('order','ASC') if 'order' in f else f['fieldPath']+' ARRAY_CONTAINS' for f in api_fields])})"  # For logging/reporting
+        index_name_str = f"{collection_id} ({', '.join(map(_describe_field, api_fields))})"  # For logging/reporting
         
         try:
-            current_app.logger.info(f"Attempting to create index: {index_name_str}")
-            request_obj = firestore_admin.projects().databases().collectionGroups().indexes().create(
-                parent=f"{parent}/{collection_id}",
-                body=index_body
+            index = Index(
+                query_scope=Index.QueryScope[index_def.get("queryScope", "COLLECTION")],  # Default to COLLECTION
+                fields=[_to_index_field(field) for field in api_fields]
             )
-            
-            # This returns a long-running operation object
-            operation = request_obj.execute()
-            
-            current_app.logger.info(f"Index creation operation started for {index_name_str}: {operation.get('name')}")
-            # Note: Index creation is asynchronous. We report initiation here.
-            # Polling the operation status is possible but complex for a simple request.
-            results.append({"index": index_name_str, "status": "Initiated", "detail": f"Operation: {operation.get('name')}"})
-            
-        except HttpError as e:
-            error_content = e.content.decode('utf-8') if hasattr(e, 'content') else str(e)
-            
-            # Check if index already exists (409 Conflict or specific error message)
-            if e.resp.status == 409 or 'already exists' in error_content.lower():
+        except KeyError as e:
+            results[position] = {"index": index_name_str, "status": "Skipped", "detail": f"Invalid value in index definition: {e}"}
+            has_errors = True
+            continue
+        
+        pending.append((position, index_name_str, f"{parent}/{collection_id}", index))
+    
+    # Each create call only starts a long-running operation server-side, so
+    # the calls are independent and can be issued concurrently
+    with ThreadPoolExecutor(max_workers=min(len(pending), INDEX_CREATE_MAX_WORKERS) or 1) as executor:
+        future_to_index = {}
+        for position, index_name_str, collection_parent, index in pending:
+            current_app.logger.info(f"Attempting to create index: {index_name_str}")
+            future = executor.submit(firestore_admin.create_index, parent=collection_parent, index=index)
+            future_to_index[future] = (position, index_name_str)
+        
+        for future in as_completed(future_to_index):
+            position, index_name_str = future_to_index[future]
+            try:
+                # This returns a long-running operation object
+                operation = future.result()
+                operation_name = operation.operation.name
+                
+                current_app.logger.info(f"Index creation operation started for {index_name_str}: {operation_name}")
+                # Note: Index creation is asynchronous. We report initiation here.
+                # Polling the operation status is possible but complex for a simple request.
+                results[position] = {"index": index_name_str, "status": "Initiated", "detail": f"Operation: {operation_name}"}
+                
+            except AlreadyExists:
                 current_app.logger.info(f"Index already exists: {index_name_str}")
-                results.append({"index": index_name_str, "status": "Exists", "detail": "Index already exists."})
-            else:
-                current_app.logger.error(f"ERROR: API error creating index {index_name_str}: {e}")
-                # Attempt to parse the error message for more specific info if possible
-                error_detail = str(e)
-                try:
-                    # Google API errors often have structured details
-                    error_info = json.loads(error_content).get('error', {})
-                    error_detail = error_info.get('message', str(e))
-                    if 'details' in error_info:
-                        error_detail += f" Details: {json.dumps(error_info['details'])}"
-                except (json.JSONDecodeError, KeyError, TypeError):
-                    pass  # Keep original error string if parsing fails
+                results[position] = {"index": index_name_str, "status": "Exists", "detail": "Index already exists."}
                 
-                results.append({"index": index_name_str, "status": "Error", "detail": error_detail})
+            except GoogleAPICallError as e:
+                current_app.logger.error(f"ERROR: API error creating index {index_name_str}: {e}")
+                error_detail = e.message
+                if e.details:
+                    error_detail += f" Details: {[str(detail) for detail in e.details]}"
+                results[position] = {"index": index_name_str, "status": "Error", "detail": error_detail}
+                has_errors = True
+                    
+            except Exception as e:
+                current_app.logger.error(f"ERROR: Unexpected error creating index {index_name_str}: {e}")
+                results[position] = {"index": index_name_str, "status": "Error", "detail": f"Unexpected error: {str(e)}"}
                 has_errors = True
-                
-        except Exception as e:
-            current_app.logger.error(f"ERROR: Unexpected error creating index {index_name_str}: {e}")
-            results.append({"index": index_name_str, "status": "Error", "detail": f"Unexpected error: {str(e)}"})
-            has_errors = True
     
     final_status_code = 207 if has_errors else 200  # Multi-Status if errors/skips occurred
     
-    return jsonify({
+    return ojsonify({
         "status": "Completed" if not has_errors else "Completed with Errors/Skips",
         "message": "Firestore index creation process finished. Check details.",
         "results": results
-    }), final_status_code
+    }, final_status_code)
 
 
 @firestore_indexes_bp.route('/validate', methods=['GET'])
 @jwt_required()
+@superadmin_required
 def validate_indexes():
     """Validate the indexes configuration file"""
-    # Check permissions
-    auth_error = require_superadmin()
-    if auth_error:
-        return auth_error
-    
     try:
         indexes_config = load_indexes_file()
         indexes = indexes_config.get('indexes', [])
         
-        validation_errors = []
-        validation_warnings = []
-        
-        # Validate each index configuration
-        for idx, index_config in enumerate(indexes):
-            # Check required fields
-            if 'collectionGroup' not in index_config:
-                validation_errors.append(f"Index {idx}: missing 'collectionGroup' field")
-            
-            if 'fields' not in index_config or not index_config['fields']:
-                validation_errors.append(f"Index {idx}: missing or empty 'fields' array")
-            
-            # Validate fields
-            if 'fields' in index_config:
-                for field_idx, field_config in enumerate(index_config['fields']):
-                    if 'fieldPath' not in field_config:
-                        validation_errors.append(
-                            f"Index {idx}, field {field_idx}: missing 'fieldPath'"
-                        )
-                    
-                    # Check that either 'order' or 'arrayConfig' is specified
-                    has_order = 'order' in field_config
-                    has_array_config = 'arrayConfig' in field_config
-                    
-                    if not has_order and not has_array_config:
-                        validation_errors.append(
-                            f"Index {idx}, field {field_idx}: must have either 'order' or 'arrayConfig'"
-                        )
-                    
-                    if has_order and has_array_config:
-                        validation_warnings.append(
-                            f"Index {idx}, field {field_idx}: has both 'order' and 'arrayConfig', 'arrayConfig' will be used"
-                        )
-                    
-                    if has_order and field_config['order'] not in ['ASCENDING', 'DESCENDING']:
-                        validation_errors.append(
-                            f"Index {idx}, field {field_idx}: 'order' must be 'ASCENDING' or 'DESCENDING'"
-                        )
-                    
-                    if has_array_config and field_config['arrayConfig'] != 'CONTAINS':
-                        validation_errors.append(
-                            f"Index {idx}, field {field_idx}: 'arrayConfig' must be 'CONTAINS'"
-                        )
+        validation_errors, validation_warnings = validate_indexes_config(indexes_config)
         
         is_valid = len(validation_errors) == 0
         
-        return jsonify({
+        return ojsonify({
             'status': 'valid' if is_valid else 'invalid',
             'total_indexes': len(indexes),
             'errors': validation_errors,
             'warnings': validation_warnings,
             'message': 'Configuration is valid' if is_valid else f'Found {len(validation_errors)} error(s)'
-        }), 200 if is_valid else 400
+        }, 200 if is_valid else 400)
         
     except FileNotFoundError as e:
-        return jsonify({'error': str(e)}), 404
+        return ojsonify({'error': str(e)}, 404)
     except Exception as e:
         current_app.logger.error(f"Error validating indexes: {str(e)}")
-        return jsonify({'error': f'Failed to validate indexes: {str(e)}'}), 500
+        return ojsonify({'error': f'Failed to validate indexes: {str(e)}'}, 500)
 
 
 @firestore_indexes_bp.route('/info', methods=['GET'])
 @jwt_required()
+@superadmin_required
 def get_indexes_info():
     """Get information about the Firestore project and database"""
-    # Check permissions
-    auth_error = require_superadmin()
-    if auth_error:
-        return auth_error
-    
     try:
         firebase_app = firebase_admin.get_app()
         project_id = firebase_app.project_id
@@ -401,16 +480,16 @@ def get_indexes_info():
                 'queryScope': index_config.get('queryScope', 'COLLECTION')
             })
         
-        return jsonify({
+        return ojsonify({
             'project_id': project_id,
             'database_name': database_name,
             'total_indexes': len(indexes),
             'collections': collections,
             'indexes_file': 'firestore.indexes.json'
-        }), 200
+        }, 200)
         
     except Exception as e:
         current_app.logger.error(f"Error getting indexes info: {str(e)}")
-        return jsonify({'error': f'Failed to get indexes info: {str(e)}'}), 500
+        return ojsonify({'error': f'Failed to get indexes info: {str(e)}'}, 500)
 
 
@@ -1,5 +1,7 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask import Blueprint, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from google.api_core.exceptions import AlreadyExists
+from google.cloud.firestore_v1.field_path import FieldPath
 from datetime import datetime
 from app.models import User, ActivityLog
 from app.schemas.user_schema import (
@@ -10,36 +12,40 @@ from app.schemas.user_schema import (
 )
 from app.models import FileCategory
 from app.utils.validation import validate_json_body, validate_query_params
+from app.utils.json_response import ojsonify, dumps, json_body_response
+from app.middleware.roles import superadmin_required
+from app.utils.cursor import encode_cursor, decode_cursor
+from app.utils.search import query_token
+from app.db import get_db, write_with_audit
 
 users_bp = Blueprint('users', __name__, url_prefix='/api/users')
 
 
-def require_admin():
-    """Decorator to require admin or superadmin role"""
-    claims = get_jwt()
-    role = claims.get('role', 'user')
-    if role not in ['admin', 'superadmin']:
-        return jsonify({
-            'error': {
-                'code': 'FORBIDDEN',
-                'message': 'Admin access required'
-            }
-        }), 403
-    return None
+def _email_exists_response():
+    """409 response for an email held by another user"""
+    return ojsonify({
+        'error': {
+            'code': 'EMAIL_EXISTS',
+            'message': 'A user with this email already exists'
+        }
+    }, 409)
+
+# GET /roles response body; the roles are static, so it is serialized once
+_ROLES_BODY = dumps({
+    'roles': [
+        {'value': 'superadmin', 'label': 'Super Admin'},
+        {'value': 'admin', 'label': 'Admin'},
+        {'value': 'manager', 'label': 'Manager'},
+        {'value': 'user', 'label': 'User'},
+        {'value': 'clark', 'label': 'Clark'}
+    ]
+})
 
 
-def require_superadmin():
-    """Decorator to require superadmin role only"""
-    claims = get_jwt()
-    role = claims.get('role', 'user')
-    if role != 'superadmin':
-        return jsonify({
-            'error': {
-                'code': 'FORBIDDEN',
-                'message': 'Superadmin access required'
-            }
-        }), 403
-    return None
+def _is_filtered(validated_data: UserQuerySchema) -> bool:
+    """Whether the listing query has a search, role, status or category filter"""
+    return bool(validated_data.search or validated_data.role or
+                validated_data.status or validated_data.category)
 
 
 def _paginate_firestore(query_results, page, per_page):
@@ -61,80 +67,32 @@ def _paginate_firestore(query_results, page, per_page):
 
 @users_bp.route('', methods=['GET'])
 @jwt_required()
+@superadmin_required
 @validate_query_params(UserQuerySchema)
 def get_users(validated_data: UserQuerySchema):
-    """Get all users with pagination and filtering"""
-    error = require_superadmin()
-    if error:
-        return error
+    """Get all users with pagination and filtering
 
-    # Get all users (Firestore doesn't support complex queries easily)
-    all_users = User.get_all()
-    
-    # Collect all unique application IDs and file category IDs from all users
-    # Also pre-calculate user counts in a single pass for performance
-    all_app_ids = set()
-    all_category_ids = set()
-    app_user_counts = {}  # app_id -> count
-    category_user_counts = {}  # category_id -> count
-    
-    for user in all_users:
-        # Count applications
-        if hasattr(user, 'assigned_application_ids') and user.assigned_application_ids:
-            all_app_ids.update(user.assigned_application_ids)
-            for app_id in user.assigned_application_ids:
-                app_user_counts[app_id] = app_user_counts.get(app_id, 0) + 1
-        
-        # Count file categories
-        if hasattr(user, 'assigned_file_category_ids') and user.assigned_file_category_ids:
-            all_category_ids.update(user.assigned_file_category_ids)
-            for cat_id in user.assigned_file_category_ids:
-                category_user_counts[cat_id] = category_user_counts.get(cat_id, 0) + 1
-    
-    # Batch load all applications and file categories for performance
-    from app.db import get_db
-    db = get_db()
-    
-    applications_cache = {}
-    if all_app_ids:
-        from app.models.application import Application
-        # Use Firestore batch get for better performance
-        app_refs = [db.collection('applications').document(app_id) for app_id in all_app_ids]
-        if app_refs:
-            docs = db.get_all(app_refs)
-            for doc in docs:
-                if doc.exists:
-                    data = doc.to_dict()
-                    data['id'] = doc.id
-                    app = Application(**data)
-                    applications_cache[app.id] = app
-    
-    file_categories_cache = {}
-    if all_category_ids:
-        from app.models.file_category import FileCategory
-        # Use Firestore batch get for better performance
-        category_refs = [db.collection('file_categories').document(cat_id) for cat_id in all_category_ids]
-        if category_refs:
-            docs = db.get_all(category_refs)
-            for doc in docs:
-                if doc.exists:
-                    data = doc.to_dict()
-                    data['id'] = doc.id
-                    category = FileCategory(**data)
-                    file_categories_cache[category.id] = category
+    Without a cursor, pages are numbered and the response includes totals.
+    With a cursor (the next_cursor of a previous response), the page is read
+    from Firestore in (sort, id) order starting after the cursor, without
+    loading or counting the rest of the collection.
+    """
+    sort_field = validated_data.sort
+    per_page = validated_data.per_page
+    search_term = validated_data.search.lower() if validated_data.search else None
     
-    # Apply filters
-    filtered_users = all_users
-    
-    # Search filter
-    if validated_data.search:
-        search_term = validated_data.search.lower()
-        filtered_users = [
-            u for u in filtered_users
-            if (hasattr(u, 'email') and search_term in u.email.lower()) or
-               (hasattr(u, 'first_name') and u.first_name and search_term in u.first_name.lower()) or
-               (hasattr(u, 'last_name') and u.last_name and search_term in u.last_name.lower())
-        ]
+    if validated_data.cursor is not None:
+        return _get_users_after_cursor(validated_data, search_term)
+
+    if search_term:
+        # Only the users matching the search are read (via the search_tokens
+        # index); relation user counts then come from count aggregations
+        all_users = None
+        filtered_users = User.search(search_term, fields=User.LIST_FIELDS)
+    else:
+        # Get all users (Firestore doesn't support complex queries easily)
+        all_users = User.get_all(fields=User.LIST_FIELDS)
+        filtered_users = all_users
     
     # Role filter
     if validated_data.role:
@@ -154,8 +112,7 @@ def get_users(validated_data: UserQuerySchema):
                any(cat_id in category_ids_set for cat_id in u.assigned_file_category_ids)
         ]
     
-    # Sorting
-    sort_field = validated_data.sort
+    # Sorting (ties broken by id, matching the order cursor pages are read in)
     reverse = validated_data.order == 'desc'
     
     def get_sort_value(user):
@@ -166,66 +123,131 @@ def get_users(validated_data: UserQuerySchema):
             return value if value else ''
         return ''
     
-    filtered_users.sort(key=get_sort_value, reverse=reverse)
+    filtered_users.sort(key=lambda u: (get_sort_value(u), u.id), reverse=reverse)
     
     # Pagination
-    pagination = _paginate_firestore(filtered_users, validated_data.page, validated_data.per_page)
-
-    return jsonify({
-        'users': [
-            user.to_dict(
-                applications_cache=applications_cache,
-                file_categories_cache=file_categories_cache,
-                app_user_counts=app_user_counts,
-                category_user_counts=category_user_counts
-            ) for user in pagination['items']
-        ],
+    pagination = _paginate_firestore(filtered_users, validated_data.page, per_page)
+    items = pagination['items']
+    
+    next_cursor = None
+    if pagination['has_next'] and items and User.cursor_sortable(sort_field, _is_filtered(validated_data)):
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_field), last.id, sort_field, validated_data.order)
+
+    relations = User.load_relations(items, all_users=all_users)
+    return ojsonify({
+        'users': [user.to_dict(**relations) for user in items],
         'pagination': {
             'page': validated_data.page,
-            'per_page': validated_data.per_page,
+            'per_page': per_page,
             'total': pagination['total'],
             'pages': pagination['pages'],
             'has_next': pagination['has_next'],
-            'has_prev': pagination['has_prev']
+            'has_prev': pagination['has_prev'],
+            'next_cursor': next_cursor
+        }
+    }, 200)
+
+
+def _get_users_after_cursor(validated_data: UserQuerySchema, search_term):
+    """Keyset-paginated branch of get_users"""
+    sort_field = validated_data.sort
+    order = validated_data.order
+    per_page = validated_data.per_page
+    
+    if not User.cursor_sortable(sort_field, _is_filtered(validated_data)):
+        return ojsonify({
+            'error': {
+                'code': 'INVALID_CURSOR',
+                'message': (
+                    f'Cursor pagination supports sorting by: {", ".join(User.SORTABLE_FIELDS)}; '
+                    f'with search, role, status or category filters only by: {", ".join(User.FILTERED_SORTABLE_FIELDS)}'
+                )
+            }
+        }, 400)
+    
+    after = None
+    if validated_data.cursor:
+        try:
+            after = decode_cursor(validated_data.cursor, sort_field, order)
+        except ValueError as e:
+            return ojsonify({
+                'error': {
+                    'code': 'INVALID_CURSOR',
+                    'message': str(e)
+                }
+            }, 400)
+    
+    # Search terms narrow the query through the search_tokens index (exact
+    # matching still happens below). Firestore allows one array filter per
+    # query, so with a search token, or more than the 30 values
+    # array-contains-any accepts, the category filter runs in Python.
+    search_token = query_token(search_term) if search_term else None
+    category_ids = validated_data.category or None
+    category_ids_set = None
+    if category_ids and (search_token or len(category_ids) > 30):
+        category_ids_set = set(category_ids)
+        category_ids = None
+    
+    # Read one extra user to learn whether another page follows. Python-side
+    # filters can't be limited in the query, so the stream is cut off instead.
+    needs_python_filter = search_term or category_ids_set
+    stream = User.stream_sorted(
+        sort_field, order,
+        role=validated_data.role,
+        status=validated_data.status,
+        category_ids=category_ids,
+        search_token=search_token,
+        after=after,
+        fields=User.LIST_FIELDS,
+        limit=None if needs_python_filter else per_page + 1
+    )
+    items = []
+    for user in stream:
+        if search_term and not user.matches_search(search_term):
+            continue
+        if category_ids_set and not category_ids_set.intersection(user._data.get('assigned_file_category_ids') or []):
+            continue
+        items.append(user)
+        if len(items) > per_page:
+            break
+    stream.close()
+    
+    has_next = len(items) > per_page
+    items = items[:per_page]
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_field), last.id, sort_field, order)
+    
+    relations = User.load_relations(items)
+    return ojsonify({
+        'users': [user.to_dict(**relations) for user in items],
+        'pagination': {
+            'per_page': per_page,
+            'has_next': has_next,
+            'next_cursor': next_cursor
         }
-    }), 200
+    }, 200)
 
 
 @users_bp.route('', methods=['POST'])
 @jwt_required()
+@superadmin_required
 @validate_json_body(UserCreateSchema)
 def create_user(validated_data: UserCreateSchema):
     """Create a new user"""
-    error = require_superadmin()
-    if error:
-        return error
-
-    # Check if email already exists
+    # Check if email already exists. The reservation written with the user
+    # is what enforces uniqueness; this check covers users created before
+    # scripts/backfill_email_claims.py ran and can go once it has run.
     if User.email_exists(validated_data.email):
-        return jsonify({
-            'error': {
-                'code': 'EMAIL_EXISTS',
-                'message': 'A user with this email already exists'
-            }
-        }), 409
+        return _email_exists_response()
 
     # Batch load file categories for validation and reuse for response
-    from app.db import get_db
-    from app.models.application import Application
-    db = get_db()
     file_categories_dict = {}
     
     if validated_data.file_category_ids:
-        # Batch load all file categories
-        category_refs = [db.collection('file_categories').document(cat_id) for cat_id in validated_data.file_category_ids]
-        if category_refs:
-            docs = db.get_all(category_refs)
-            for doc in docs:
-                if doc.exists:
-                    data = doc.to_dict()
-                    data['id'] = doc.id
-                    category = FileCategory(**data)
-                    file_categories_dict[category.id] = category
+        file_categories_dict = FileCategory.get_many(validated_data.file_category_ids)
         
         # Validate file category IDs
         invalid_ids = []
@@ -236,12 +258,12 @@ def create_user(validated_data: UserCreateSchema):
             elif hasattr(category, 'status') and category.status != 'active':
                 invalid_ids.append(category_id)
         if invalid_ids:
-            return jsonify({
+            return ojsonify({
                 'error': {
                     'code': 'INVALID_FILE_CATEGORY_IDS',
                     'message': f'Invalid or inactive file category IDs: {invalid_ids}. Please use valid active category IDs.'
                 }
-            }), 400
+            }, 400)
 
     # Create user
     user = User(
@@ -261,9 +283,7 @@ def create_user(validated_data: UserCreateSchema):
     if validated_data.file_category_ids:
         user.assigned_file_category_ids = validated_data.file_category_ids
 
-    user.save()
-
-    # Log activity
+    # Log activity (committed together with the user)
     current_user_id = get_jwt_identity()
     activity = ActivityLog(
         event_type='user_created',
@@ -271,112 +291,58 @@ def create_user(validated_data: UserCreateSchema):
         description=f'Created user: {user.email}',
         ip_address=request.remote_addr
     )
-    activity.save()
-
-    # Batch load applications for response (if needed)
-    applications_cache = {}
-    if validated_data.application_ids:
-        app_refs = [db.collection('applications').document(app_id) for app_id in validated_data.application_ids]
-        if app_refs:
-            docs = db.get_all(app_refs)
-            for doc in docs:
-                if doc.exists:
-                    data = doc.to_dict()
-                    data['id'] = doc.id
-                    app = Application(**data)
-                    applications_cache[app.id] = app
-    
-    # Reuse already loaded file categories for response
-    file_categories_cache = file_categories_dict
-
-    # Calculate user counts efficiently by loading all users once and counting in memory
-    app_user_counts = {}
-    category_user_counts = {}
-    
-    if validated_data.application_ids or validated_data.file_category_ids:
-        # Initialize counts for the applications/categories we care about
-        app_ids_set = set(validated_data.application_ids) if validated_data.application_ids else set()
-        cat_ids_set = set(validated_data.file_category_ids) if validated_data.file_category_ids else set()
-        
-        for app_id in app_ids_set:
-            app_user_counts[app_id] = 0
-        for cat_id in cat_ids_set:
-            category_user_counts[cat_id] = 0
-        
-        # Load all users once (much faster than N+M individual Firestore queries)
-        all_users = User.get_all()
-        
-        # Count in a single pass through all users
-        for u in all_users:
-            if hasattr(u, 'assigned_application_ids') and u.assigned_application_ids:
-                for app_id in u.assigned_application_ids:
-                    if app_id in app_ids_set:
-                        app_user_counts[app_id] += 1
-            
-            if hasattr(u, 'assigned_file_category_ids') and u.assigned_file_category_ids:
-                for cat_id in u.assigned_file_category_ids:
-                    if cat_id in cat_ids_set:
-                        category_user_counts[cat_id] += 1
-
-    return jsonify({
+    # The email reservation commits with the user, so a concurrent create
+    # that slipped past the check above fails here instead of duplicating it
+    try:
+        write_with_audit(user, activity, stage=user.claim_email)
+    except AlreadyExists:
+        return _email_exists_response()
+
+    return ojsonify({
         'message': 'User created successfully',
-        'user': user.to_dict(
-            applications_cache=applications_cache if applications_cache else None,
-            file_categories_cache=file_categories_cache if file_categories_cache else None,
-            app_user_counts=app_user_counts if app_user_counts else None,
-            category_user_counts=category_user_counts if category_user_counts else None
-        )
-    }), 201
+        'user': user.to_dict(**User.load_relations([user], known_categories=file_categories_dict))
+    }, 201)
 
 
 @users_bp.route('/<user_id>', methods=['GET'])
 @jwt_required()
+@superadmin_required
 def get_user(user_id):
     """Get a specific user by ID"""
-    error = require_superadmin()
-    if error:
-        return error
-
-    user = User.get_by_id(user_id)
+    user = User.get_cached(user_id)
     if not user:
-        return jsonify({
+        return ojsonify({
             'error': {
                 'code': 'USER_NOT_FOUND',
                 'message': f'User with id {user_id} not found'
             }
-        }), 404
+        }, 404)
 
-    return jsonify(user.to_dict()), 200
+    return ojsonify(user.to_dict(), 200)
 
 
 @users_bp.route('/<user_id>', methods=['PUT'])
 @jwt_required()
+@superadmin_required
 @validate_json_body(UserUpdateSchema)
 def update_user(user_id, validated_data: UserUpdateSchema):
     """Update a user"""
-    error = require_superadmin()
-    if error:
-        return error
-
-    user = User.get_by_id(user_id)
+    user = User.get_cached(user_id)
     if not user:
-        return jsonify({
+        return ojsonify({
             'error': {
                 'code': 'USER_NOT_FOUND',
                 'message': f'User with id {user_id} not found'
             }
-        }), 404
+        }, 404)
 
     # Update fields (only if provided)
-    if validated_data.email:
+    previous_email = None
+    if validated_data.email and validated_data.email != user.email:
         # Check if new email already exists
         if User.email_exists(validated_data.email, exclude_id=user_id):
-            return jsonify({
-                'error': {
-                    'code': 'EMAIL_EXISTS',
-                    'message': 'A user with this email already exists'
-                }
-            }), 409
+            return _email_exists_response()
+        previous_email = user.email
         user.email = validated_data.email
 
     if validated_data.password:
@@ -401,25 +367,24 @@ def update_user(user_id, validated_data: UserUpdateSchema):
     # Update file categories
     if validated_data.file_category_ids is not None:
         # Validate file category IDs exist in database
+        categories = FileCategory.get_many(validated_data.file_category_ids)
         invalid_ids = []
         for category_id in validated_data.file_category_ids:
-            category = FileCategory.get_by_id(category_id)
+            category = categories.get(category_id)
             if not category:
                 invalid_ids.append(category_id)
             elif hasattr(category, 'status') and category.status != 'active':
                 invalid_ids.append(category_id)
         if invalid_ids:
-            return jsonify({
+            return ojsonify({
                 'error': {
                     'code': 'INVALID_FILE_CATEGORY_IDS',
                     'message': f'Invalid or inactive file category IDs: {invalid_ids}. Please use valid active category IDs.'
                 }
-            }), 400
+            }, 400)
         user.assigned_file_category_ids = validated_data.file_category_ids
 
-    user.save()
-
-    # Log activity
+    # Log activity (committed together with the update)
     current_user_id = get_jwt_identity()
     activity = ActivityLog(
         event_type='user_updated',
@@ -427,92 +392,101 @@ def update_user(user_id, validated_data: UserUpdateSchema):
         description=f'Updated user: {user.email}',
         ip_address=request.remote_addr
     )
-    activity.save()
 
-    return jsonify({
+    def move_email_claim(batch):
+        User.release_email(batch, previous_email)
+        user.claim_email(batch)
+
+    try:
+        write_with_audit(user, activity, stage=move_email_claim if previous_email else None)
+    except AlreadyExists:
+        return _email_exists_response()
+
+    return ojsonify({
         'message': 'User updated successfully',
         'user': user.to_dict()
-    }), 200
+    }, 200)
 
 
 @users_bp.route('/<user_id>', methods=['DELETE'])
 @jwt_required()
+@superadmin_required
 def delete_user(user_id):
     """Delete a user"""
-    error = require_superadmin()
-    if error:
-        return error
-
-    user = User.get_by_id(user_id)
+    user = User.get_cached(user_id)
     if not user:
-        return jsonify({
+        return ojsonify({
             'error': {
                 'code': 'USER_NOT_FOUND',
                 'message': f'User with id {user_id} not found'
             }
-        }), 404
+        }, 404)
 
     # Prevent deleting yourself
     current_user_id = get_jwt_identity()
     if user_id == current_user_id:
-        return jsonify({
+        return ojsonify({
             'error': {
                 'code': 'CANNOT_DELETE_SELF',
                 'message': 'You cannot delete your own account'
             }
-        }), 400
+        }, 400)
 
-    # Handle activity logs - set user_id to None
-    from app.db import get_db
+    # Detach the user's activity logs (user_id -> None), delete the user and
+    # log the deletion in batched writes. Firestore caps a batch at 500
+    # writes, so with many logs the earlier updates go out in full batches
+    # and the last batch carries the delete and the new activity entry.
     db = get_db()
-    activity_logs = db.collection('activity_logs').where('user_id', '==', user_id).stream()
+    batch = db.batch()
+    pending = 0
+    # Only the references are needed, so project to the document ID (an
+    # empty select() would return every field)
+    activity_logs = (
+        db.collection('activity_logs')
+        .where('user_id', '==', user_id)
+        .select([FieldPath.document_id()])
+        .stream()
+    )
     for doc in activity_logs:
-        doc.reference.update({'user_id': None})
+        if pending == 500 - 3:  # keep room for the delete, email release and activity entry
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+        batch.update(doc.reference, {'user_id': None})
+        pending += 1
 
-    email = user.email
-    user.delete()
-
-    # Log activity
     activity = ActivityLog(
         event_type='user_deleted',
         user_id=current_user_id,
-        description=f'Deleted user: {email}',
+        description=f'Deleted user: {user.email}',
         ip_address=request.remote_addr
     )
-    activity.save()
+    user.delete(batch=batch)
+    User.release_email(batch, user.email)
+    activity.save(batch=batch)
+    batch.commit()
 
-    return jsonify({
+    return ojsonify({
         'message': 'User deleted successfully'
-    }), 200
+    }, 200)
 
 
 @users_bp.route('/roles', methods=['GET'])
 @jwt_required()
+@superadmin_required
 def get_roles():
     """Get all available user roles"""
-    error = require_superadmin()
-    if error:
-        return error
-    
-    return jsonify({
-        'roles': [
-            {'value': 'superadmin', 'label': 'Super Admin'},
-            {'value': 'admin', 'label': 'Admin'},
-            {'value': 'manager', 'label': 'Manager'},
-            {'value': 'user', 'label': 'User'},
-            {'value': 'clark', 'label': 'Clark'}
-        ]
-    }), 200
+    response = json_body_response(_ROLES_BODY, 200)
+    # Roles only change with a deploy; the response is per-user (auth), so private
+    response.headers['Cache-Control'] = 'private, max-age=3600'
+    return response
 
 
 @users_bp.route('/file-categories', methods=['GET'])
 @jwt_required()
+@superadmin_required
 def get_file_categories():
     """Get all available file categories"""
-    error = require_superadmin()
-    if error:
-        return error
-    
     # Get all active file categories from database
     all_categories = FileCategory.get_all()
     active_categories = [
@@ -520,7 +494,7 @@ def get_file_categories():
         if hasattr(cat, 'status') and cat.status == 'active'
     ]
     
-    return jsonify({
+    return ojsonify({
         'file_categories': [
             {
                 'value': cat.code,
@@ -528,7 +502,7 @@ def get_file_categories():
             }
             for cat in active_categories
         ]
-    }), 200
+    }, 200)
 
 
 @users_bp.route('/init', methods=['POST'])
@@ -536,23 +510,17 @@ def get_file_categories():
 def init_superuser(validated_data: InitSuperuserSchema):
     """Initialize superuser - only works if no users exist in the database"""
     # Check if any users exist
-    existing_users = User.get_all()
-    if len(existing_users) > 0:
-        return jsonify({
+    if User.exists():
+        return ojsonify({
             'error': {
                 'code': 'INITIALIZATION_FAILED',
                 'message': 'Initialization can only be performed when no users exist in the database'
             }
-        }), 403
+        }, 403)
     
     # Check if email already exists (shouldn't happen, but just in case)
     if User.email_exists(validated_data.email):
-        return jsonify({
-            'error': {
-                'code': 'EMAIL_EXISTS',
-                'message': 'A user with this email already exists'
-            }
-        }), 409
+        return _email_exists_response()
     
     # Create superuser
     user = User(
@@ -563,9 +531,15 @@ def init_superuser(validated_data: InitSuperuserSchema):
         last_name=validated_data.last_name
     )
     user.set_password(validated_data.password)
-    user.save()
+    batch = get_db().batch()
+    user.save(batch=batch)
+    user.claim_email(batch)
+    try:
+        batch.commit()
+    except AlreadyExists:
+        return _email_exists_response()
     
-    return jsonify({
+    return ojsonify({
         'message': 'Superuser created successfully',
         'user': user.to_dict()
-    }), 201
+    }, 201)
@@ -129,6 +129,7 @@ class UserQuerySchema(BaseModel):
     """User query parameters schema"""
     page: int = Field(default=1, ge=1)
     per_page: int = Field(default=20, ge=1, le=100)
+    cursor: Optional[str] = Field(default=None, description="Opaque next_cursor from a previous response; switches to keyset pagination (page is ignored)")
     search: Optional[str] = None
     role: Optional[Literal['user', 'admin', 'superadmin', 'manager', 'clark']] = None
     status: Optional[Literal['active', 'inactive']] = None
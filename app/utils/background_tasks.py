@@ -1,7 +1,18 @@
+import atexit
+import queue
 import threading
 import time
 from app.utils.monitoring import save_system_metrics
 
+# Activity logs waiting to be written by the audit worker
+_audit_q = queue.Queue(maxsize=1024)
+# Seconds shutdown waits for the worker to finish the activity it is saving
+AUDIT_FLUSH_TIMEOUT = 10
+# Queued after the last activity at shutdown to stop the worker
+_STOP = object()
+_audit_worker = None
+_audit_worker_lock = threading.Lock()
+
 
 class MetricsCollector(threading.Thread):
     """Background thread to collect system metrics periodically"""
@@ -26,3 +37,71 @@ class MetricsCollector(threading.Thread):
         """Stop the metrics collector"""
         self.running = False
 
+
+def _save_activity(activity, attempts=3):
+    """Save an activity log, retrying transient failures with backoff"""
+    for attempt in range(attempts):
+        try:
+            activity.save()
+            return
+        except Exception as e:
+            if attempt == attempts - 1:
+                print(f"Error saving activity log: {e}")
+            else:
+                time.sleep(0.5 * 2 ** attempt)
+
+
+def _drain_audit_queue():
+    """Write queued activity logs until stopped at shutdown"""
+    while True:
+        activity = _audit_q.get()
+        try:
+            if activity is _STOP:
+                return
+            _save_activity(activity)
+        finally:
+            _audit_q.task_done()
+
+
+def enqueue_activity(activity):
+    """Save an activity log off the request path
+
+    Falls back to a synchronous save when the queue is full so audits are
+    never dropped.
+    """
+    global _audit_worker
+    if _audit_worker is None or not _audit_worker.is_alive():
+        with _audit_worker_lock:
+            if _audit_worker is None or not _audit_worker.is_alive():
+                _audit_worker = threading.Thread(target=_drain_audit_queue, daemon=True)
+                _audit_worker.start()
+    try:
+        _audit_q.put_nowait(activity)
+    except queue.Full:
+        _save_activity(activity)
+
+
+@atexit.register
+def flush_activity_queue():
+    """Write activity logs still queued or being saved (runs at interpreter shutdown)
+
+    The worker is a daemon thread and would be killed mid-save, so after
+    the queue is drained it is stopped and joined, which lets an activity it
+    already took off the queue (possibly in retry backoff) finish first.
+    """
+    while True:
+        try:
+            activity = _audit_q.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            _save_activity(activity)
+        finally:
+            _audit_q.task_done()
+    worker = _audit_worker
+    if worker is not None and worker.is_alive():
+        try:
+            _audit_q.put(_STOP, timeout=AUDIT_FLUSH_TIMEOUT)
+        except queue.Full:
+            return
+        worker.join(AUDIT_FLUSH_TIMEOUT)
@@ -0,0 +1,37 @@
+"""Opaque cursors for keyset pagination
+
+A cursor records the sort value and document ID of the last item on a
+page, plus the sort it was issued for, as URL-safe base64 JSON.
+"""
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Tuple
+import orjson
+
+
+def encode_cursor(value: Any, doc_id: str, sort: str, order: str) -> str:
+    """Encode the (sort value, document ID) of the last item on a page"""
+    payload = {'s': sort, 'o': order, 'id': doc_id, 'v': value}
+    if isinstance(value, datetime):
+        payload['v'] = value.isoformat()
+        payload['t'] = 'dt'
+    return base64.urlsafe_b64encode(orjson.dumps(payload)).decode('ascii')
+
+
+def decode_cursor(cursor: str, sort: str, order: str) -> Tuple[Any, str]:
+    """Decode a cursor into (sort value, document ID)
+
+    Raises ValueError if the cursor is malformed or was issued for a
+    different sort field or order.
+    """
+    try:
+        payload = orjson.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        value, doc_id = payload['v'], payload['id']
+        if payload.get('t') == 'dt':
+            value = datetime.fromisoformat(value)
+    except (binascii.Error, orjson.JSONDecodeError, UnicodeError, KeyError, TypeError, ValueError):
+        raise ValueError('Malformed cursor')
+    if payload.get('s') != sort or payload.get('o') != order or not isinstance(doc_id, str):
+        raise ValueError('Cursor does not match the requested sort')
+    return value, doc_id
@@ -0,0 +1,38 @@
+"""Shared HTTP session for outbound requests to other services"""
+import threading
+from http.cookiejar import DefaultCookiePolicy
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Get the process-wide requests session, building it on first use
+
+    Connections are kept alive and reused across requests. Pool sizes come
+    from HTTP_POOL_CONNECTIONS (hosts kept) and HTTP_POOL_MAXSIZE
+    (connections per host) in the app config. Must be called in an app
+    context the first time; the returned session can be used from worker
+    threads.
+
+    The session is shared by every user's requests, so it stores no
+    cookies: a backend session cookie set for one user's call would
+    otherwise be sent on everyone else's.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                adapter = HTTPAdapter(
+                    pool_connections=current_app.config['HTTP_POOL_CONNECTIONS'],
+                    pool_maxsize=current_app.config['HTTP_POOL_MAXSIZE']
+                )
+                session = requests.Session()
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
@@ -0,0 +1,27 @@
+"""Fast JSON responses backed by orjson"""
+from datetime import date
+import orjson
+from flask import current_app
+
+
+def _default(obj):
+    """Serialize types orjson does not handle natively"""
+    # Firestore returns DatetimeWithNanoseconds, a datetime subclass orjson rejects
+    if isinstance(obj, date):
+        return obj.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(obj) -> bytes:
+    """Serialize obj to JSON bytes"""
+    return orjson.dumps(obj, default=_default)
+
+
+def json_body_response(body: bytes, status: int = 200):
+    """Build a JSON response from an already serialized body"""
+    return current_app.response_class(body, status=status, mimetype='application/json')
+
+
+def ojsonify(obj, status: int = 200):
+    """Drop-in replacement for ``jsonify(obj), status`` using orjson"""
+    return json_body_response(dumps(obj), status)
@@ -2,6 +2,7 @@
 import os
 import json
 import logging
+from functools import lru_cache
 from flask import request
 
 logger = logging.getLogger(__name__)
@@ -25,35 +26,53 @@ def prepare_flask_request(request_obj):
     }
 
 
+@lru_cache(maxsize=1)
+def _read_saml_settings_file():
+    """Read and parse saml/settings.json, raising if it is missing or invalid
+
+    Only successful loads are cached (lru_cache does not store exceptions),
+    so a missing or unreadable file is tried again on the next call.
+    """
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    saml_settings_path = os.path.join(current_dir, '..', '..', 'saml', 'settings.json')
+    
+    if not os.path.exists(saml_settings_path):
+        saml_settings_path = os.path.join(os.getcwd(), 'saml', 'settings.json')
+    
+    logger.info(f"Looking for SAML settings at: {saml_settings_path}")
+    
+    if not os.path.exists(saml_settings_path):
+        raise FileNotFoundError(f"SAML settings file not found at: {saml_settings_path}")
+    with open(saml_settings_path, 'r') as f:
+        settings = json.load(f)
+    logger.info("SAML settings loaded from JSON file")
+    return settings
+
+
 def load_saml_settings_from_json():
-    """Load SAML settings from the settings.json file"""
+    """Load SAML settings from the settings.json file
+
+    Read once per process; the returned dict is shared between requests.
+    Returns None (and tries again next time) if the file is missing or
+    can't be parsed. Call _read_saml_settings_file.cache_clear() to reload.
+    """
     try:
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        saml_settings_path = os.path.join(current_dir, '..', '..', 'saml', 'settings.json')
-        
-        if not os.path.exists(saml_settings_path):
-            saml_settings_path = os.path.join(os.getcwd(), 'saml', 'settings.json')
-        
-        logger.info(f"Looking for SAML settings at: {saml_settings_path}")
-        
-        if os.path.exists(saml_settings_path):
-            with open(saml_settings_path, 'r') as f:
-                settings = json.load(f)
-                logger.info("SAML settings loaded from JSON file")
-                return settings
-        else:
-            logger.warning(f"SAML settings file not found at: {saml_settings_path}")
-            return None
-            
+        return _read_saml_settings_file()
+    except FileNotFoundError as e:
+        logger.warning(str(e))
+        return None
     except Exception as e:
         logger.error(f"Error loading SAML settings: {e}")
         return None
 
 
+@lru_cache(maxsize=1)
 def get_saml_settings():
     """
     Get hardcoded SAML settings as fallback
     These should be configured via environment variables or settings.json
+    Built once per process from the environment; the returned dict is shared
+    between requests (call get_saml_settings.cache_clear() to rebuild it).
     """
     return {
         'strict': False,  # Changed from True to False for more lenient validation
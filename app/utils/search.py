@@ -0,0 +1,30 @@
+"""Search token helpers for Firestore array-contains lookups
+
+Firestore cannot do substring matching, so searchable documents store the
+lowercased 3-grams of their text fields in a ``search_tokens`` array. Any
+substring of at least 3 characters shares its first 3-gram with the text
+it came from, so ``array_contains`` on that 3-gram narrows the read down to
+candidate documents, which are then checked exactly in Python.
+"""
+from typing import List, Optional
+
+NGRAM_SIZE = 3
+
+
+def search_tokens(*values: Optional[str]) -> List[str]:
+    """Build the sorted, de-duplicated 3-grams of the given text values"""
+    tokens = set()
+    for value in values:
+        if not value:
+            continue
+        text = value.lower()
+        tokens.update(text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1))
+    return sorted(tokens)
+
+
+def query_token(term: str) -> Optional[str]:
+    """Token to use for array_contains, or None if the term is too short to index"""
+    term = term.lower()
+    if len(term) < NGRAM_SIZE:
+        return None
+    return term[:NGRAM_SIZE]
@@ -38,7 +38,7 @@ def validate_request(schema: Type[BaseModel], source: str = 'json'):
                         }
                     }), 500
                 # Validate with Pydantic
-                validated_data = schema(**data)
+                validated_data = schema.model_validate(data)
                 # Add validated data to kwargs
                 kwargs['validated_data'] = validated_data
                 return f(*args, **kwargs)
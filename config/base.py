@@ -26,6 +26,9 @@ class Config:
     ITEMS_PER_PAGE = 20
     # Frontend URL for SSO redirects
     FRONTEND_URL = os.environ.get('FRONTEND_URL', 'http://localhost:3000')
+    # Outbound HTTP connection pool (hosts kept, connections per host)
+    HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', 10))
+    HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 10))
 
 class DevelopmentConfig(Config):
 
@@ -0,0 +1,25 @@
+"""Reserve the emails of users created before email reservations existed
+
+New users get a user_emails document in the same write that creates them,
+which is what makes duplicate emails fail. Users created before that have
+none, so run this once against every existing database when deploying the
+change. It only writes missing reservations and is safe to re-run.
+"""
+from app import create_app
+from app.models import User
+from app.db import init_firestore
+
+
+def backfill_email_claims():
+    """Write missing user_emails reservations and report duplicate emails"""
+    app = create_app()
+    with app.app_context():
+        init_firestore(app)
+        created, conflicts = User.backfill_email_claims()
+        print(f"Reserved {created} user emails")
+        for email in conflicts:
+            print(f"  Email used by more than one user (resolve manually): {email}")
+
+
+if __name__ == '__main__':
+    backfill_email_claims()
@@ -0,0 +1,24 @@
+"""Write search_tokens on documents saved before search tokens existed
+
+Search of 3+ characters only matches documents that have a search_tokens
+field, so this must be run once against every existing database when
+deploying the search token change. It only updates documents whose tokens
+are missing or stale and is safe to re-run.
+"""
+from app import create_app
+from app.models import FileCategory, User
+from app.db import init_firestore
+
+
+def backfill_search_tokens():
+    """Backfill search_tokens on all searchable collections"""
+    app = create_app()
+    with app.app_context():
+        init_firestore(app)
+        for model, label in ((FileCategory, 'file categories'), (User, 'users')):
+            updated = model.backfill_search_tokens()
+            print(f"Backfilled search tokens on {updated} {label}")
+
+
+if __name__ == '__main__':
+    backfill_search_tokens()
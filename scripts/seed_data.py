@@ -1,6 +1,10 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
 from app import create_app
 from app.models import User, Application, FileCategory
-from app.db import init_firestore
+from app.models.user import hash_password
+from app.db import init_firestore, get_db
 from datetime import datetime, timedelta
 
 
@@ -10,6 +14,10 @@ def seed_database():
     with app.app_context():
         # Initialize Firestore
         init_firestore(app)
+        # All new documents go out in a single write batch at the end. IDs
+        # are allocated client-side when a write is staged, so users can
+        # reference new applications before anything is committed.
+        batch = get_db().batch()
         
         # Note: Firestore doesn't require clearing data like SQL databases
         # If you want to clear, you'd need to delete collections manually
@@ -51,15 +59,17 @@ def seed_database():
         ]
         
         applications = {}
+        # Look up all existing applications in one query
+        existing_apps = Application.get_by_field_in('name', [d['name'] for d in applications_data])
         for app_data in applications_data:
             # Check if application already exists
-            existing = Application.get_by_name(app_data['name'])
+            existing = existing_apps.get(app_data['name'])
             if existing:
                 applications[app_data['name']] = existing
                 print(f"  Application already exists: {app_data['name']} (ID: {existing.id})")
             else:
                 app = Application(**app_data)
-                app.save()
+                app.save(batch=batch)
                 applications[app_data['name']] = app
                 print(f"  Created application: {app_data['name']} (ID: {app.id})")
         
@@ -81,9 +91,10 @@ def seed_database():
         ]
         
         file_categories = {}
+        existing_categories = FileCategory.get_by_field_in('code', VALID_CATEGORIES)
         for category_code in VALID_CATEGORIES:
             # Check if category already exists
-            existing = FileCategory.get_by_code(category_code)
+            existing = existing_categories.get(category_code)
             if existing:
                 file_categories[category_code] = existing
                 print(f"  File category already exists: {category_code} (ID: {existing.id})")
@@ -96,11 +107,14 @@ def seed_database():
                     description=f"File category for {category_name}",
                     status='active'
                 )
-                file_category.save()
+                file_category.save(batch=batch)
                 file_categories[category_code] = file_category
                 print(f"  Created file category: {category_code} (ID: {file_category.id})")
         
         print(f"Created/verified {len(file_categories)} file categories")
+        backfilled = FileCategory.backfill_search_tokens()
+        if backfilled:
+            print(f"Backfilled search tokens on {backfilled} file categories")
 
         # Create Users
         print("Creating users...")
@@ -162,9 +176,18 @@ def seed_database():
         ]
 
         created_users = 0
+        existing_users = User.get_by_field_in('email', [d['email'] for d in users_data])
+        # Hash the new users' passwords in parallel; bcrypt is deliberately
+        # slow and releases the GIL, so threads overlap the work
+        new_users_data = [d for d in users_data if d['email'] not in existing_users]
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            password_hashes = dict(zip(
+                (d['email'] for d in new_users_data),
+                executor.map(hash_password, (d['password'] for d in new_users_data))
+            ))
         for user_data in users_data:
             # Check if user already exists
-            existing = User.get_by_email(user_data['email'])
+            existing = existing_users.get(user_data['email'])
             if existing:
                 print(f"  User already exists: {user_data['email']} (ID: {existing.id})")
                 continue  # Skip creating duplicate user
@@ -176,11 +199,14 @@ def seed_database():
                 first_name=user_data['first_name'],
                 last_name=user_data['last_name']
             )
-            user.set_password(user_data['password'])
+            user.password_hash = password_hashes[user_data['email']]
 
-            # Set last login for active users (random dates in last 30 days)
+            # Set last login for active users (pseudo-random dates in last 30
+            # days, derived from the email so they are the same on every run;
+            # the builtin hash() of a str changes per process)
             if user_data['status'] == 'active':
-                days_ago = hash(user_data['email']) % 30
+                digest = hashlib.blake2b(user_data['email'].encode(), digest_size=1).digest()
+                days_ago = int.from_bytes(digest, 'big') % 30
                 user.last_login = datetime.utcnow() - timedelta(days=days_ago)
 
             # Assign applications
@@ -190,11 +216,17 @@ def seed_database():
                     assigned_app_ids.append(applications[app_name].id)
             user.assigned_application_ids = assigned_app_ids
 
-            user.save()
+            user.save(batch=batch)
+            user.claim_email(batch)
             created_users += 1
             print(f"  Created user: {user_data['email']} (ID: {user.id})")
 
         print(f"Created/verified {len(users_data)} users ({created_users} new, {len(users_data) - created_users} existing)")
+        backfilled = User.backfill_search_tokens()
+        if backfilled:
+            print(f"Backfilled search tokens on {backfilled} users")
+
+        batch.commit()
 
         print("\nDatabase seeded successfully!")
         print("\nSample credentials:")
@@ -0,0 +1,30 @@
+import threading
+from app.utils import background_tasks
+from app.utils.background_tasks import enqueue_activity, flush_activity_queue
+
+
+class SlowActivity:
+    """Activity whose save blocks until released"""
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.saved = False
+
+    def save(self):
+        self.started.set()
+        self.release.wait(5)
+        self.saved = True
+
+
+def test_flush_waits_for_activity_in_flight(monkeypatch):
+    """Test shutdown waits for an activity the worker is already saving"""
+    monkeypatch.setattr(background_tasks, '_audit_worker', None)
+    activity = SlowActivity()
+    enqueue_activity(activity)
+    assert activity.started.wait(5)
+    threading.Timer(0.1, activity.release.set).start()
+
+    flush_activity_queue()
+
+    assert activity.saved
+    assert not background_tasks._audit_worker.is_alive()
@@ -0,0 +1,20 @@
+from datetime import datetime, timezone
+import pytest
+from app.utils.cursor import encode_cursor, decode_cursor
+
+
+def test_cursor_round_trip_datetime():
+    """Test datetime sort values survive encoding"""
+    value = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    cursor = encode_cursor(value, 'abc', 'created_date', 'desc')
+    assert decode_cursor(cursor, 'created_date', 'desc') == (value, 'abc')
+
+
+def test_cursor_rejects_other_sort_and_garbage():
+    """Test mismatched or malformed cursors raise ValueError"""
+    cursor = encode_cursor('a@example.com', 'abc', 'email', 'asc')
+    assert decode_cursor(cursor, 'email', 'asc') == ('a@example.com', 'abc')
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 'email', 'desc')
+    with pytest.raises(ValueError):
+        decode_cursor('not a cursor!', 'email', 'asc')
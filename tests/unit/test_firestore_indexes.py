@@ -0,0 +1,50 @@
+from app.routes.firestore_indexes import validate_indexes_config, load_indexes_file
+
+
+def test_bundled_indexes_file_is_valid():
+    """Test the shipped firestore.indexes.json passes validation"""
+    errors, warnings = validate_indexes_config(load_indexes_file())
+    assert errors == []
+    assert warnings == []
+
+
+def test_validate_indexes_config_errors():
+    """Test structural problems are reported per index and field"""
+    config = {
+        'indexes': [
+            {'fields': []},
+            {
+                'collectionGroup': 'users',
+                'fields': [
+                    {'order': 'ASCENDING'},
+                    {'fieldPath': 'role'},
+                    {'fieldPath': 'status', 'order': 'ASC'},
+                    {'fieldPath': 'tags', 'arrayConfig': 'ANY'}
+                ]
+            }
+        ]
+    }
+    errors, warnings = validate_indexes_config(config)
+    assert "Index 0: missing 'collectionGroup'" in errors
+    assert "Index 0: missing or empty 'fields' array" in errors
+    assert "Index 1, field 0: missing 'fieldPath'" in errors
+    assert "Index 1, field 1: must have either 'order' or 'arrayConfig'" in errors
+    assert "Index 1, field 2: 'order' must be 'ASCENDING' or 'DESCENDING'" in errors
+    assert "Index 1, field 3: 'arrayConfig' must be 'CONTAINS'" in errors
+    assert len(errors) == 6
+    assert warnings == []
+
+
+def test_validate_indexes_config_warns_on_order_and_array_config():
+    """Test a field with both 'order' and 'arrayConfig' is a warning"""
+    config = {
+        'indexes': [{
+            'collectionGroup': 'users',
+            'fields': [{'fieldPath': 'tags', 'order': 'ASCENDING', 'arrayConfig': 'CONTAINS'}]
+        }]
+    }
+    errors, warnings = validate_indexes_config(config)
+    assert errors == []
+    assert warnings == [
+        "Index 0, field 0: has both 'order' and 'arrayConfig', 'arrayConfig' will be used"
+    ]
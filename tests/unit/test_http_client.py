@@ -0,0 +1,43 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from flask import Flask
+from app.utils import http_client
+
+
+class CookieHandler(BaseHTTPRequestHandler):
+    """Sets a session cookie and echoes back the Cookie header it received"""
+    def do_GET(self):
+        body = (self.headers.get('Cookie') or '').encode()
+        self.send_response(200)
+        self.send_header('Set-Cookie', 'session=user-a; Path=/')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def backend_url():
+    server = HTTPServer(('127.0.0.1', 0), CookieHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/'
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_session_does_not_share_cookies(backend_url, monkeypatch):
+    """Test a cookie set on one request is not sent on the next"""
+    monkeypatch.setattr(http_client, '_session', None)
+    app = Flask(__name__)
+    app.config.update(HTTP_POOL_CONNECTIONS=1, HTTP_POOL_MAXSIZE=1)
+    with app.app_context():
+        session = http_client.get_http_session()
+    first = session.get(backend_url, timeout=5)
+    second = session.get(backend_url, timeout=5)
+    assert first.cookies.get('session') == 'user-a'
+    assert second.text == ''
+    assert len(session.cookies) == 0
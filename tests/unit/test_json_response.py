@@ -0,0 +1,24 @@
+from datetime import datetime, timezone
+from flask import Flask
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+from app.utils.json_response import ojsonify
+
+
+def test_ojsonify_status_and_mimetype():
+    """Test response status and content type"""
+    with Flask(__name__).app_context():
+        response = ojsonify({'message': 'ok'}, 201)
+        assert response.status_code == 201
+        assert response.mimetype == 'application/json'
+        assert response.get_json() == {'message': 'ok'}
+
+
+def test_ojsonify_firestore_datetime():
+    """Test Firestore datetime subclass is serialized as ISO 8601"""
+    with Flask(__name__).app_context():
+        value = DatetimeWithNanoseconds(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        response = ojsonify({'created': value, 'updated': datetime(2024, 1, 2)})
+        assert response.get_json() == {
+            'created': '2024-01-02T03:04:05+00:00',
+            'updated': '2024-01-02T00:00:00'
+        }
@@ -0,0 +1,107 @@
+import threading
+import pytest
+from app.routes import file_categories
+from app.routes.file_categories import _cached_body, _invalidate_list_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    """Start and end each test with an empty list cache"""
+    _invalidate_list_cache()
+    yield
+    _invalidate_list_cache()
+
+
+def counting_build(body=b'body'):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return body
+    return build, calls
+
+
+def test_cached_body_hit_within_ttl():
+    """Test a second lookup within the TTL does not rebuild"""
+    build, calls = counting_build()
+    assert _cached_body(('list',), build) == b'body'
+    assert _cached_body(('list',), build) == b'body'
+    assert len(calls) == 1
+
+
+def test_cached_body_rebuilds_after_ttl(monkeypatch):
+    """Test an expired entry is rebuilt"""
+    monkeypatch.setattr(file_categories, 'LIST_CACHE_TTL', 0)
+    build, calls = counting_build()
+    _cached_body(('list',), build)
+    _cached_body(('list',), build)
+    assert len(calls) == 2
+
+
+def test_cached_body_rebuilds_after_invalidate():
+    """Test a write clears cached bodies"""
+    build, calls = counting_build()
+    _cached_body(('list',), build)
+    _invalidate_list_cache()
+    _cached_body(('list',), build)
+    assert len(calls) == 2
+
+
+def test_cached_body_not_stored_when_write_races_build():
+    """Test a body built while a write happened is returned but not cached"""
+    calls = []
+
+    def build():
+        calls.append(1)
+        if len(calls) == 1:
+            _invalidate_list_cache()  # a write lands mid-build
+            return b'stale'
+        return b'fresh'
+
+    assert _cached_body(('list',), build) == b'stale'
+    assert _cached_body(('list',), build) == b'fresh'
+    assert _cached_body(('list',), build) == b'fresh'
+    assert len(calls) == 2
+
+
+def test_cached_body_followers_retry_after_leader_fails():
+    """Test requests waiting on a failed build build the body themselves"""
+    key = ('list',)
+    building = threading.Event()
+    fail = threading.Event()
+
+    def failing_build():
+        building.set()
+        fail.wait(5)
+        raise RuntimeError('Firestore unavailable')
+
+    leader_errors = []
+
+    def leader():
+        try:
+            _cached_body(key, failing_build)
+        except RuntimeError as e:
+            leader_errors.append(e)
+
+    leader_thread = threading.Thread(target=leader)
+    leader_thread.start()
+    assert building.wait(5)
+
+    follower_build, follower_calls = counting_build(b'retried')
+    follower_results = []
+    follower_thread = threading.Thread(
+        target=lambda: follower_results.append(_cached_body(key, follower_build))
+    )
+    follower_thread.start()
+    follower_thread.join(0.1)
+    # The follower waits on the leader instead of building concurrently
+    assert follower_calls == []
+
+    fail.set()
+    leader_thread.join(5)
+    follower_thread.join(5)
+    assert len(leader_errors) == 1
+    assert follower_results == [b'retried']
+    assert len(follower_calls) == 1
+    assert _cached_body(key, follower_build) == b'retried'
+    assert len(follower_calls) == 1
@@ -0,0 +1,26 @@
+import pytest
+from app.utils.saml_utils import load_saml_settings_from_json, _read_saml_settings_file
+
+
+@pytest.fixture
+def saml_dir(tmp_path, monkeypatch):
+    """Empty saml/ directory in a temporary working directory"""
+    monkeypatch.chdir(tmp_path)
+    _read_saml_settings_file.cache_clear()
+    yield tmp_path / 'saml'
+    _read_saml_settings_file.cache_clear()
+
+
+def test_load_saml_settings_retries_after_failures(saml_dir):
+    """Test a missing or invalid file is not cached, a loaded one is"""
+    assert load_saml_settings_from_json() is None
+
+    saml_dir.mkdir()
+    settings_file = saml_dir / 'settings.json'
+    settings_file.write_text('{"sp": ')
+    assert load_saml_settings_from_json() is None
+
+    settings_file.write_text('{"sp": {"entityId": "test"}}')
+    settings = load_saml_settings_from_json()
+    assert settings == {'sp': {'entityId': 'test'}}
+    assert load_saml_settings_from_json() is settings
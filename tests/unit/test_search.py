@@ -0,0 +1,50 @@
+from app.utils.search import search_tokens, query_token
+
+
+def test_search_tokens_are_lowercased_trigrams():
+    """Test tokens are the de-duplicated 3-grams of each value"""
+    assert search_tokens('ABab', None, 'ab') == ['aba', 'bab']
+
+
+def test_query_token_is_token_of_matching_text():
+    """Test any substring's query token is among the text's tokens"""
+    tokens = search_tokens('INVOICE_2024', 'Monthly Invoices')
+    assert query_token('Voice') in tokens
+    assert query_token('ly inv') in tokens
+    assert query_token('in') is None
+
+
+class FakeDoc:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class FakeQuery:
+    """Stands in for a Firestore query; filters are ignored"""
+    def __init__(self, docs):
+        self.docs = docs
+
+    def where(self, *args):
+        return self
+
+    def stream(self):
+        return iter(self.docs)
+
+
+def test_file_category_search_sorts_matches_missing_sort_field(monkeypatch):
+    """Test matches without the sort field sort last instead of failing"""
+    from app.models.file_category import FileCategory
+    docs = [
+        FakeDoc('1', {'code': 'PAYROLL_B', 'name': 'Payroll B'}),
+        FakeDoc('2', {'code': 'PAYROLL_LEGACY'}),
+        FakeDoc('3', {'code': 'PAYROLL_A', 'name': 'Payroll A'}),
+    ]
+    monkeypatch.setattr(FileCategory, 'get_collection', classmethod(lambda cls: FakeQuery(docs)))
+    matches = FileCategory.search('payroll', sort='name')
+    assert [cat.id for cat in matches] == ['3', '1', '2']
+    matches = FileCategory.search('payroll', sort='name', order='desc')
+    assert [cat.id for cat in matches] == ['2', '1', '3']